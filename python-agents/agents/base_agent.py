@@ -4,20 +4,86 @@ Provides common functionality and interface for all specialized agents
 """
 
 import asyncio
-import json
 import logging
+import os
 import time
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+from concurrent.futures import Executor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass, field
 
+import httpx
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+
+from utils.json_utils import json_dumps
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+OPENROUTER_API_BASE = "https://openrouter.ai/api/v1"
+
+# HTTP/2 client shared by every agent so concurrent LLM calls reuse one connection pool
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_shared_http_client() -> httpx.AsyncClient:
+    """Get (or lazily create) the shared async HTTP client"""
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        )
+    return _shared_http_client
+
+async def close_shared_http_client():
+    """Close the shared async HTTP client"""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
+@lru_cache(maxsize=1)
+def _openrouter_key() -> str:
+    """Read the OpenRouter API key from the environment once per process"""
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY environment variable not set")
+    return api_key
+
+@lru_cache(maxsize=8)
+def _get_tokenizer(model: str):
+    """Get the tiktoken encoding for a model, falling back to cl100k_base"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+@lru_cache(maxsize=4096)
+def _count_tokens(text: str, model: str) -> int:
+    """Count tokens in a piece of text for the given model"""
+    if tiktoken is None:
+        # Rough estimation: 1 token ≈ 4 characters
+        return len(text) // 4
+    return len(_get_tokenizer(model).encode(text, disallowed_special=()))
+
+def _message_text(message: BaseMessage) -> str:
+    """Text of a message, joining the text parts of multi-part content"""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in message.content
+    )
+
+@dataclass(slots=True)
 class AgentConfig:
     """Configuration for an AI agent"""
     model: str = "llama-3-70b"
@@ -27,7 +93,7 @@ class AgentConfig:
     system_prompt: str = ""
     tools: List[str] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class AgentResult:
     """Result from an agent's analysis"""
     success: bool
@@ -36,6 +102,7 @@ class AgentResult:
     errors: List[str] = field(default_factory=list)
     processing_time: float = 0.0
     tokens_used: Optional[int] = None
+    cached_tokens: Optional[int] = None
 
 class BaseAgent(ABC):
     """
@@ -51,7 +118,7 @@ class BaseAgent(ABC):
         self.config = config or AgentConfig()
         self.llm = None
         self.is_active = True
-        self.last_run = None
+        self._last_run_ns: Optional[int] = None
         self.total_runs = 0
         self.total_tokens = 0
         
@@ -68,8 +135,10 @@ class BaseAgent(ABC):
                 model=self.config.model,
                 temperature=self.config.temperature,
                 max_tokens=self.config.max_tokens,
-                openai_api_base="https://openrouter.ai/api/v1",
-                openai_api_key=self._get_openrouter_key()
+                openai_api_base=OPENROUTER_API_BASE,
+                openai_api_key=self._get_openrouter_key(),
+                http_async_client=_get_shared_http_client(),
+                stream_usage=True
             )
             logger.info(f"LLM initialized with model: {self.config.model}")
         except Exception as e:
@@ -78,11 +147,14 @@ class BaseAgent(ABC):
     
     def _get_openrouter_key(self) -> str:
         """Get OpenRouter API key from environment"""
-        import os
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY environment variable not set")
-        return api_key
+        return _openrouter_key()
+    
+    @property
+    def last_run(self) -> Optional[datetime]:
+        """Time of the last completed LLM call"""
+        if self._last_run_ns is None:
+            return None
+        return datetime.fromtimestamp(self._last_run_ns / 1e9, tz=timezone.utc)
     
     @abstractmethod
     async def analyze(
@@ -90,7 +162,8 @@ class BaseAgent(ABC):
         parsed_elements: Dict[str, Any],
         project_id: int,
         model: Optional[str] = None,
-        tone: Optional[str] = None
+        tone: Optional[str] = None,
+        executor: Optional[Executor] = None
     ) -> AgentResult:
         """
         Main analysis method - must be implemented by subclasses
@@ -100,6 +173,7 @@ class BaseAgent(ABC):
             project_id: Database project ID
             model: Override default model
             tone: Override default tone
+            executor: Pool for CPU-bound steps, kept off the event loop
         
         Returns:
             AgentResult with analysis data
@@ -136,7 +210,10 @@ class BaseAgent(ABC):
     async def _call_llm(
         self,
         messages: List[Any],
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        on_chunk: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+        tone: Optional[str] = None
     ) -> AgentResult:
         """
         Make a call to the language model
@@ -144,11 +221,17 @@ class BaseAgent(ABC):
         Args:
             messages: List of messages to send to LLM
             context: Context for processing the response
+            on_chunk: Optional callback invoked with each streamed content chunk
+            model: Model for this call, defaulting to the configured one
+            tone: Tone for this call's system prompt, defaulting to the configured one
         
         Returns:
             AgentResult with processed data
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        # Per-call overrides leave the shared config untouched for concurrent callers
+        model = model or self.config.model
+        tone = tone or self.config.tone
         
         try:
             if not self.is_active or not self.llm:
@@ -156,51 +239,65 @@ class BaseAgent(ABC):
             
             # Add system message if not present
             if not any(isinstance(msg, SystemMessage) for msg in messages):
-                system_prompt = self.get_system_prompt(self.config.tone)
+                system_prompt = self.get_system_prompt(tone)
                 messages.insert(0, SystemMessage(content=system_prompt))
             
-            # Call the LLM
-            response = await self.llm.ainvoke(messages)
+            # Stream the LLM response so callers can start on partial output
+            chunks = []
+            usage = None
+            async for chunk in self.llm.astream(messages, model=model):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    if on_chunk:
+                        on_chunk(chunk.content)
+                if chunk.usage_metadata:
+                    usage = chunk.usage_metadata
+            content = "".join(chunks)
             
             # Process the response
-            processed_data = self.process_response(response.content, context)
+            processed_data = self.process_response(content, context)
             
             # Calculate processing time
-            processing_time = time.time() - start_time
+            processing_time = (time.perf_counter_ns() - start_ns) / 1e9
             
             # Update agent stats
-            self.last_run = datetime.utcnow()
+            self._last_run_ns = time.time_ns()
             self.total_runs += 1
             
-            # Estimate token usage (rough calculation)
-            estimated_tokens = self._estimate_tokens(messages, response.content)
-            self.total_tokens += estimated_tokens
+            # Prefer provider-reported usage, falling back to an estimate
+            estimated_tokens = self._estimate_tokens(messages, content, model)
+            tokens_used = usage.get("total_tokens", estimated_tokens) if usage else estimated_tokens
+            cached_tokens = self._get_cached_tokens(usage)
+            self.total_tokens += tokens_used
             
-            logger.info(f"LLM call completed in {processing_time:.2f}s, estimated tokens: {estimated_tokens}")
+            logger.info(f"LLM call completed in {processing_time:.2f}s, tokens: {tokens_used}, cached tokens: {cached_tokens}")
             
             return AgentResult(
                 success=True,
                 data=processed_data,
                 metadata={
-                    "model": self.config.model,
-                    "tone": self.config.tone,
+                    "model": model,
+                    "tone": tone,
                     "processing_time": processing_time,
-                    "estimated_tokens": estimated_tokens
+                    "estimated_tokens": estimated_tokens,
+                    "tokens_used": tokens_used,
+                    "cached_tokens": cached_tokens
                 },
                 processing_time=processing_time,
-                tokens_used=estimated_tokens
+                tokens_used=tokens_used,
+                cached_tokens=cached_tokens
             )
             
         except Exception as e:
-            processing_time = time.time() - start_time
+            processing_time = (time.perf_counter_ns() - start_ns) / 1e9
             logger.error(f"LLM call failed: {e}")
             
             return AgentResult(
                 success=False,
                 data={},
                 metadata={
-                    "model": self.config.model,
-                    "tone": self.config.tone,
+                    "model": model,
+                    "tone": tone,
                     "processing_time": processing_time,
                     "error": str(e)
                 },
@@ -208,11 +305,17 @@ class BaseAgent(ABC):
                 processing_time=processing_time
             )
     
-    def _estimate_tokens(self, messages: List[Any], response: str) -> int:
+    def _get_cached_tokens(self, usage: Optional[Dict[str, Any]]) -> int:
+        """Extract prompt tokens served from the provider's prefix cache"""
+        if not usage:
+            return 0
+        input_details = usage.get("input_token_details") or {}
+        return input_details.get("cache_read", 0) or 0
+    
+    def _estimate_tokens(self, messages: List[Any], response: str, model: Optional[str] = None) -> int:
         """Estimate token usage for the conversation"""
-        # Rough estimation: 1 token ≈ 4 characters
-        total_chars = sum(len(str(msg.content)) for msg in messages) + len(response)
-        return int(total_chars / 4)
+        model = model or self.config.model
+        return sum(_count_tokens(_message_text(msg), model) for msg in messages) + _count_tokens(response, model)
     
     async def test_agent(self, test_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -234,7 +337,7 @@ class BaseAgent(ABC):
             }
             
             # Create test messages
-            test_message = HumanMessage(content=f"Test data: {json.dumps(test_data, indent=2)}")
+            test_message = HumanMessage(content=f"Test data: {json_dumps(test_data, indent=True)}")
             
             # Call LLM with test data
             result = await self._call_llm([test_message], test_context)
@@ -270,13 +373,21 @@ class BaseAgent(ABC):
     
     def update_config(self, new_config: AgentConfig):
         """Update agent configuration"""
+        old_config = self.config
         self.config = new_config
-        self._initialize_llm()
+        
+        # Only rebuild the client (and its connection pool) when the model changes
+        if self.llm is None or new_config.model != old_config.model:
+            self._initialize_llm()
+        else:
+            self.llm.temperature = new_config.temperature
+            self.llm.max_tokens = new_config.max_tokens
+        
         logger.info(f"Configuration updated for {self.__class__.__name__}")
     
     def reset_stats(self):
         """Reset agent statistics"""
-        self.last_run = None
+        self._last_run_ns = None
         self.total_runs = 0
         self.total_tokens = 0
         logger.info(f"Statistics reset for {self.__class__.__name__}")
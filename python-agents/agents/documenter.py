@@ -3,19 +3,156 @@ Documenter Agent - Generates comprehensive documentation for code elements
 Analyzes PHP classes, methods, functions, and routes to create clear explanations
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-import re
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+import jinja2
+import numpy as np
 from langchain_core.messages import HumanMessage
 
+try:
+    # RE2 guarantees linear-time matching on large files
+    import re2 as re
+except ImportError:
+    import re
+
+from utils.json_utils import json_loads
 from .base_agent import BaseAgent, AgentConfig, AgentResult
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+_json_decoder = json.JSONDecoder()
+
+# Constant few-shot example shared by every documentation request. It lives in
+# the system prompt so the cacheable prompt prefix is long and stable.
+DOCUMENTATION_EXAMPLE = """Example of well-formed documentation for a method element:
+
+Element Type: method
+Element Name: findByEmail
+File Path: app/Repositories/UserRepository.php
+
+{
+    "description": "Looks up a single user by email address, returning null when no user matches.",
+    "parameters": [
+        {"name": "email", "type": "string", "description": "Email address to search for", "required": true}
+    ],
+    "return_value": "The matching User model instance, or null if none exists.",
+    "examples": [
+        "Resolve the current user during login: $user = $repository->findByEmail($request->email);",
+        "Check for an existing account before registration."
+    ],
+    "code_snippets": [
+        "$user = app(UserRepository::class)->findByEmail('jane@example.com');\\nif ($user === null) {\\n    abort(404);\\n}"
+    ],
+    "dependencies": ["User model"],
+    "related_elements": ["UserRepository::create", "AuthController::login"]
+}"""
+
+TONE_GUIDANCE = {
+    "professional": "Use formal, technical language suitable for professional documentation.",
+    "friendly": "Use approachable, conversational language while maintaining technical accuracy.",
+    "strict": "Use precise, formal language with strict adherence to technical standards.",
+    "mentor": "Use educational language that explains concepts and provides learning opportunities.",
+    "casual": "Use relaxed, informal language while maintaining clarity and usefulness."
+}
+
+SYSTEM_PROMPT_BASE = f"""You are an expert PHP developer and technical writer specializing in code documentation.
+
+Your mission is to create clear, comprehensive, and actionable documentation for PHP code elements including classes, methods, functions, routes, models, and migrations.
+
+Key principles:
+1. **Clarity**: Explain what the code does in simple terms
+2. **Completeness**: Cover all important aspects (parameters, returns, examples)
+3. **Practicality**: Provide real-world usage examples
+4. **Accuracy**: Ensure all information is technically correct
+5. **Consistency**: Use consistent formatting and terminology
+
+Always structure your responses as JSON and focus on being helpful to developers who will use this code.
+
+{DOCUMENTATION_EXAMPLE}
+
+"""
+
+# System prompts are built once per tone; tone guidance goes last to keep the prefix shared
+SYSTEM_PROMPTS = {tone: SYSTEM_PROMPT_BASE + guidance for tone, guidance in TONE_GUIDANCE.items()}
+
+# Instruction templates, compiled once. Each prompt is split into the rendered
+# instructions (identical for every request with the same tone, marked for
+# provider-side prompt caching) and a short element payload. With the system
+# prompt, the cacheable prefix is roughly 90% of the input tokens of a
+# single-element request.
+PROMPT_ENV = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
+    auto_reload=False,
+    keep_trailing_newline=True
+)
+
+@lru_cache(maxsize=None)
+def _render_instructions(template_name: str, tone: str) -> str:
+    """Render a prompt's static instructions once per tone"""
+    return PROMPT_ENV.get_template(template_name).render(tone=tone)
+
+def _prompt_message(instructions: str, payload: str) -> HumanMessage:
+    """Build a message whose instruction prefix is marked cacheable"""
+    return HumanMessage(content=[
+        {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": payload}
+    ])
+
+class StreamingJSONArrayParser:
+    """Incrementally extracts complete top-level objects from a streamed JSON array"""
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.buffer = []
+    
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of text and return any objects completed by it"""
+        completed = []
+        
+        for char in text:
+            if self.depth > 0:
+                self.buffer.append(char)
+            
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            
+            if char == '"':
+                self.in_string = self.depth > 0
+            elif char == '{':
+                if self.depth == 0:
+                    self.buffer = [char]
+                self.depth += 1
+            elif char == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        parsed = json_loads("".join(self.buffer))
+                        if isinstance(parsed, dict):
+                            completed.append(parsed)
+                    except json.JSONDecodeError:
+                        pass
+                    self.buffer = []
+        
+        return completed
+
+@dataclass(slots=True)
 class DocumentationElement:
     """Represents a documented code element"""
     element_type: str  # class, method, function, route, model, migration
@@ -23,24 +160,106 @@ class DocumentationElement:
     file_path: str
     line_number: Optional[int] = None
     description: str = ""
-    parameters: List[Dict[str, Any]] = None
+    parameters: List[Dict[str, Any]] = field(default_factory=list)
     return_value: str = ""
-    examples: List[str] = None
-    code_snippets: List[str] = None
-    dependencies: List[str] = None
-    related_elements: List[str] = None
+    examples: List[str] = field(default_factory=list)
+    code_snippets: List[str] = field(default_factory=list)
+    dependencies: List[str] = field(default_factory=list)
+    related_elements: List[str] = field(default_factory=list)
+
+# Class, method and route declarations are matched in a single pass
+DOCUMENTATION_PATTERN = re.compile(
+    r"(?P<class>class\s+(?P<class_name>\w+)(?:\s+extends\s+(?P<extends>\w+))?(?:\s+implements\s+(?P<implements>[\w\s,]+))?)"
+    r"|(?P<method>(?:public|private|protected|static)?\s*function\s+(?P<method_name>\w+)\s*\()"
+    r"|(?P<route>Route::(?:get|post|put|patch|delete)\s*\(\s*['\"](?P<route_path>[^'\"]+)['\"])"
+)
+
+_extraction_executor: Optional[Executor] = None
+
+def _get_extraction_executor() -> Executor:
+    """Get (or lazily create) the executor used for element extraction"""
+    global _extraction_executor
+    if _extraction_executor is None:
+        if re.__name__ == "re2":
+            # RE2 releases the GIL while matching, so threads are enough
+            _extraction_executor = ThreadPoolExecutor()
+        else:
+            _extraction_executor = ProcessPoolExecutor()
+    return _extraction_executor
+
+def _find_line_numbers(content: str, char_positions: List[int]) -> List[int]:
+    """Find the line numbers for a list of character positions"""
+    if not char_positions:
+        return []
+    
+    # One array element per character so indexes match str offsets
+    if content.isascii():
+        chars = np.frombuffer(content.encode("ascii"), dtype=np.uint8)
+    else:
+        chars = np.frombuffer(content.encode("utf-32-le"), dtype=np.uint32)
+    
+    newline_positions = np.flatnonzero(chars == 0x0A)
+    return (np.searchsorted(newline_positions, char_positions, side="left") + 1).tolist()
+
+def _extract_from_file(file_path: str, content: str) -> List[DocumentationElement]:
+    """Extract documentation elements from a single file's content"""
+    elements = []
+    
+    # Scan the file once and resolve all line numbers in one vectorized pass
+    matches = list(DOCUMENTATION_PATTERN.finditer(content))
+    line_numbers = _find_line_numbers(content, [match.start() for match in matches])
+    
+    # Dispatch on the matched alternative
+    for match, line_number in zip(matches, line_numbers):
+        kind = match.lastgroup
+        
+        if kind == "class":
+            class_name = match.group("class_name")
+            extends = match.group("extends")
+            implements = match.group("implements")
+            
+            elements.append(DocumentationElement(
+                element_type="class",
+                element_name=class_name,
+                file_path=file_path,
+                line_number=line_number,
+                dependencies=[extends] if extends else [],
+                related_elements=[implements] if implements else []
+            ))
+            
+            # Models and migrations are also documented as their own element type
+            if extends and extends.startswith("Model"):
+                elements.append(DocumentationElement(
+                    element_type="model",
+                    element_name=class_name,
+                    file_path=file_path,
+                    line_number=line_number
+                ))
+            elif extends and extends.startswith("Migration"):
+                elements.append(DocumentationElement(
+                    element_type="migration",
+                    element_name=class_name,
+                    file_path=file_path,
+                    line_number=line_number
+                ))
+        
+        elif kind == "method":
+            elements.append(DocumentationElement(
+                element_type="method",
+                element_name=match.group("method_name"),
+                file_path=file_path,
+                line_number=line_number
+            ))
+        
+        elif kind == "route":
+            elements.append(DocumentationElement(
+                element_type="route",
+                element_name=match.group("route_path"),
+                file_path=file_path,
+                line_number=line_number
+            ))
     
-    def __post_init__(self):
-        if self.parameters is None:
-            self.parameters = []
-        if self.examples is None:
-            self.examples = []
-        if self.code_snippets is None:
-            self.code_snippets = []
-        if self.dependencies is None:
-            self.dependencies = []
-        if self.related_elements is None:
-            self.related_elements = []
+    return elements
 
 class DocumenterAgent(BaseAgent):
     """
@@ -55,7 +274,13 @@ class DocumenterAgent(BaseAgent):
     - Generate model and migration documentation
     """
     
-    def __init__(self, config: Optional[AgentConfig] = None):
+    def __init__(
+        self,
+        config: Optional[AgentConfig] = None,
+        max_concurrency: int = 8,
+        batch_size: int = 15,
+        doc_cache_size: int = 4096
+    ):
         # Set default configuration for documentation
         if config is None:
             config = AgentConfig(
@@ -67,22 +292,26 @@ class DocumenterAgent(BaseAgent):
         
         super().__init__(config)
         
-        # Documentation patterns and templates
-        self.documentation_patterns = {
-            "class": r"class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([\w\s,]+))?",
-            "method": r"(?:public|private|protected|static)?\s*function\s+(\w+)\s*\(",
-            "function": r"function\s+(\w+)\s*\(",
-            "route": r"Route::(?:get|post|put|patch|delete)\s*\(\s*['\"]([^'\"]+)['\"]",
-            "model": r"class\s+(\w+)\s+extends\s+Model",
-            "migration": r"class\s+(\w+)\s+extends\s+Migration"
-        }
+        # Limit concurrent LLM calls to respect OpenRouter rate limits
+        self.max_concurrency = max_concurrency
+        self._llm_semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # Number of elements documented per LLM call
+        self.batch_size = batch_size
+        # Rough output token budget reserved for each documented element
+        self.tokens_per_element = 400
+        
+        # Generated documentation keyed by element content hash, least recently used first
+        self.doc_cache_size = doc_cache_size
+        self._doc_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
     
     async def analyze(
         self,
         parsed_elements: Dict[str, Any],
         project_id: int,
         model: Optional[str] = None,
-        tone: Optional[str] = None
+        tone: Optional[str] = None,
+        executor: Optional[Executor] = None
     ) -> AgentResult:
         """
         Analyze parsed code elements and generate documentation
@@ -92,32 +321,55 @@ class DocumenterAgent(BaseAgent):
             project_id: Database project ID
             model: Override default model
             tone: Override default tone
+            executor: Pool for element extraction, defaults to the module's own
         
         Returns:
             AgentResult with generated documentation
         """
         try:
-            if model:
-                self.config.model = model
-            if tone:
-                self.config.tone = tone
+            # Resolved per call: the agent is shared by concurrent sessions,
+            # so overrides must not be written to self.config
+            model = model or self.config.model
+            tone = tone or self.config.tone
             
             logger.info(f"Starting documentation analysis for project {project_id}")
             
             # Extract documentation elements from parsed code
-            doc_elements = self._extract_documentation_elements(parsed_elements)
+            doc_elements = await self._extract_documentation_elements(parsed_elements, executor)
             
-            # Generate documentation for each element
-            documented_elements = []
+            # Group identical elements so each distinct one is documented only once
+            element_keys = [self._get_cache_key(element, model, tone) for element in doc_elements]
+            representatives: Dict[str, DocumentationElement] = {}
+            for key, element in zip(element_keys, doc_elements):
+                representatives.setdefault(key, element)
             
-            for element in doc_elements:
-                try:
-                    documentation = await self._generate_element_documentation(element)
-                    if documentation:
-                        documented_elements.append(documentation)
-                except Exception as e:
-                    logger.warning(f"Failed to document element {element.element_name}: {e}")
+            # Generate documentation for batches of distinct elements concurrently
+            batches = self._create_batches(list(representatives.values()))
+            results = await asyncio.gather(
+                *[self._generate_batch_documentation(batch, model, tone) for batch in batches],
+                return_exceptions=True
+            )
+            
+            generated: Dict[int, Dict[str, Any]] = {}
+            
+            for batch, batch_docs in zip(batches, results):
+                if isinstance(batch_docs, Exception):
+                    logger.warning(f"Failed to document batch of {len(batch)} elements: {batch_docs}")
                     continue
+                for element, documentation in zip(batch, batch_docs):
+                    if documentation:
+                        generated[id(element)] = documentation
+            
+            # Broadcast each group's documentation back to every member
+            documented_elements = []
+            
+            for key, element in zip(element_keys, doc_elements):
+                if representatives[key] is element:
+                    documentation = generated.get(id(element))
+                else:
+                    documentation = self._get_cached_documentation(element, model, tone)
+                if documentation:
+                    documented_elements.append(documentation)
             
             # Create comprehensive documentation report
             documentation_report = {
@@ -128,8 +380,8 @@ class DocumenterAgent(BaseAgent):
                 "summary": self._generate_documentation_summary(documented_elements),
                 "metadata": {
                     "agent": "documenter",
-                    "model": self.config.model,
-                    "tone": self.config.tone,
+                    "model": model,
+                    "tone": tone,
                     "timestamp": self.last_run.isoformat() if self.last_run else None
                 }
             }
@@ -140,8 +392,8 @@ class DocumenterAgent(BaseAgent):
                 success=True,
                 data=documentation_report,
                 metadata={
-                    "model": self.config.model,
-                    "tone": self.config.tone,
+                    "model": model,
+                    "tone": tone,
                     "elements_processed": len(doc_elements),
                     "elements_documented": len(documented_elements)
                 }
@@ -156,105 +408,52 @@ class DocumenterAgent(BaseAgent):
                 errors=[str(e)]
             )
     
-    def _extract_documentation_elements(self, parsed_elements: Dict[str, Any]) -> List[DocumentationElement]:
-        """Extract documentation elements from parsed code"""
-        elements = []
+    async def _extract_documentation_elements(
+        self,
+        parsed_elements: Dict[str, Any],
+        executor: Optional[Executor] = None
+    ) -> List[DocumentationElement]:
+        """Extract documentation elements from the file content the orchestrator supplies with each file's parsed data"""
+        loop = asyncio.get_running_loop()
+        executor = executor or _get_extraction_executor()
+        file_paths = list(parsed_elements.keys())
         
-        for file_path, file_data in parsed_elements.items():
-            try:
-                file_content = file_data.get("content", "")
-                file_lines = file_content.split('\n')
-                
-                # Extract classes
-                class_matches = re.finditer(self.documentation_patterns["class"], file_content)
-                for match in class_matches:
-                    class_name = match.group(1)
-                    extends = match.group(2)
-                    implements = match.group(3)
-                    
-                    element = DocumentationElement(
-                        element_type="class",
-                        element_name=class_name,
-                        file_path=file_path,
-                        line_number=self._find_line_number(file_lines, match.start()),
-                        dependencies=[extends] if extends else [],
-                        related_elements=[implements] if implements else []
-                    )
-                    elements.append(element)
-                
-                # Extract methods and functions
-                method_matches = re.finditer(self.documentation_patterns["method"], file_content)
-                for match in method_matches:
-                    method_name = match.group(1)
-                    
-                    element = DocumentationElement(
-                        element_type="method",
-                        element_name=method_name,
-                        file_path=file_path,
-                        line_number=self._find_line_number(file_lines, match.start())
-                    )
-                    elements.append(element)
-                
-                # Extract routes
-                route_matches = re.finditer(self.documentation_patterns["route"], file_content)
-                for match in route_matches:
-                    route_path = match.group(1)
-                    
-                    element = DocumentationElement(
-                        element_type="route",
-                        element_name=route_path,
-                        file_path=file_path,
-                        line_number=self._find_line_number(file_lines, match.start())
-                    )
-                    elements.append(element)
-                
-                # Extract models
-                model_matches = re.finditer(self.documentation_patterns["model"], file_content)
-                for match in model_matches:
-                    model_name = match.group(1)
-                    
-                    element = DocumentationElement(
-                        element_type="model",
-                        element_name=model_name,
-                        file_path=file_path,
-                        line_number=self._find_line_number(file_lines, match.start())
-                    )
-                    elements.append(element)
-                
-                # Extract migrations
-                migration_matches = re.finditer(self.documentation_patterns["migration"], file_content)
-                for match in migration_matches:
-                    migration_name = match.group(1)
-                    
-                    element = DocumentationElement(
-                        element_type="migration",
-                        element_name=migration_name,
-                        file_path=file_path,
-                        line_number=self._find_line_number(file_lines, match.start())
-                    )
-                    elements.append(element)
-                
-            except Exception as e:
-                logger.warning(f"Failed to extract elements from {file_path}: {e}")
+        # Scan files in parallel off the event loop
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    executor,
+                    _extract_from_file,
+                    file_path,
+                    parsed_elements[file_path].get("content", "")
+                )
+                for file_path in file_paths
+            ],
+            return_exceptions=True
+        )
+        
+        elements = []
+        for file_path, file_elements in zip(file_paths, results):
+            if isinstance(file_elements, Exception):
+                logger.warning(f"Failed to extract elements from {file_path}: {file_elements}")
                 continue
+            elements.extend(file_elements)
         
         return elements
     
-    def _find_line_number(self, lines: List[str], char_position: int) -> Optional[int]:
-        """Find the line number for a character position"""
-        try:
-            current_pos = 0
-            for i, line in enumerate(lines):
-                current_pos += len(line) + 1  # +1 for newline
-                if current_pos > char_position:
-                    return i + 1
-            return None
-        except Exception:
-            return None
-    
-    async def _generate_element_documentation(self, element: DocumentationElement) -> Optional[Dict[str, Any]]:
+    async def _generate_element_documentation(
+        self,
+        element: DocumentationElement,
+        model: str,
+        tone: str
+    ) -> Optional[Dict[str, Any]]:
         """Generate documentation for a single element using LLM"""
         try:
+            cached = self._get_cached_documentation(element, model, tone)
+            if cached:
+                return cached
+            cache_key = self._get_cache_key(element, model, tone)
+            
             # Create context for the LLM
             context = {
                 "element_type": element.element_type,
@@ -265,16 +464,15 @@ class DocumenterAgent(BaseAgent):
                 "related_elements": element.related_elements
             }
             
-            # Create prompt for documentation generation
-            prompt = self._create_documentation_prompt(element)
-            
             # Call LLM to generate documentation
-            messages = [HumanMessage(content=prompt)]
-            result = await self._call_llm(messages, context)
+            messages = [self._create_documentation_prompt(element, tone)]
+            async with self._llm_semaphore:
+                result = await self._call_llm(messages, context, model=model, tone=tone)
             
             if result.success:
                 # Process and enhance the documentation
-                documentation = self._enhance_documentation(element, result.data)
+                self._cache_documentation(cache_key, result.data)
+                documentation = self._enhance_documentation(element, result.data, model, tone)
                 return documentation
             else:
                 logger.warning(f"Failed to generate documentation for {element.element_name}: {result.errors}")
@@ -284,58 +482,182 @@ class DocumenterAgent(BaseAgent):
             logger.error(f"Error generating documentation for {element.element_name}: {e}")
             return None
     
-    def _create_documentation_prompt(self, element: DocumentationElement) -> str:
-        """Create a prompt for documentation generation"""
+    def _create_batches(self, elements: List[DocumentationElement]) -> List[List[DocumentationElement]]:
+        """Group elements into batches that fit the model's token budget"""
+        batches = []
+        current_batch = []
+        current_tokens = 0
         
-        base_prompt = f"""
-You are an expert PHP developer and technical writer. Generate comprehensive documentation for the following code element:
-
-Element Type: {element.element_type}
-Element Name: {element.element_name}
-File Path: {element.file_path}
-Line Number: {element.line_number or 'Unknown'}
-
-Please provide:
-
-1. **Description**: A clear, concise description of what this element does
-2. **Parameters**: If applicable, list and describe all parameters
-3. **Return Value**: If applicable, describe what this element returns
-4. **Examples**: Provide 2-3 practical usage examples
-5. **Code Snippets**: Include relevant code snippets that demonstrate usage
-6. **Dependencies**: List any dependencies or requirements
-7. **Related Elements**: Mention related classes, methods, or functions
-
-Use a {self.config.tone} tone and be specific and actionable. Focus on helping developers understand how to use this element effectively.
-
-Format your response as JSON with the following structure:
-{{
-    "description": "Clear description",
-    "parameters": [
-        {{"name": "param_name", "type": "param_type", "description": "param_description", "required": true/false}}
-    ],
-    "return_value": "Description of return value",
-    "examples": ["Example 1", "Example 2"],
-    "code_snippets": ["Code snippet 1", "Code snippet 2"],
-    "dependencies": ["dependency1", "dependency2"],
-    "related_elements": ["related1", "related2"]
-}}
-"""
+        for element in elements:
+            entry = self._format_batch_entry(len(current_batch), element)
+            element_tokens = self._estimate_tokens([], entry) + self.tokens_per_element
+            
+            if current_batch and (
+                len(current_batch) >= self.batch_size
+                or current_tokens + element_tokens > self.config.max_tokens
+            ):
+                batches.append(current_batch)
+                current_batch = []
+                current_tokens = 0
+            
+            current_batch.append(element)
+            current_tokens += element_tokens
+        
+        if current_batch:
+            batches.append(current_batch)
+        
+        return batches
+    
+    async def _generate_batch_documentation(
+        self,
+        batch: List[DocumentationElement],
+        model: str,
+        tone: str
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Generate documentation for a batch of elements with a single LLM call"""
+        documented = [self._get_cached_documentation(element, model, tone) for element in batch]
+        pending = [i for i, doc in enumerate(documented) if doc is None]
+        
+        if not pending:
+            return documented
+        if len(pending) == 1:
+            documented[pending[0]] = await self._generate_element_documentation(batch[pending[0]], model, tone)
+            return documented
+        
+        pending_elements = [batch[i] for i in pending]
+        pending_keys = [self._get_cache_key(element, model, tone) for element in pending_elements]
+        context = {
+            "batch_size": len(pending_elements),
+            "elements": [element.element_name for element in pending_elements]
+        }
+        
+        def dispatch(item: Any):
+            """Attach a documentation object to its element by index"""
+            if not isinstance(item, dict):
+                return
+            index = item.pop("index", None)
+            if isinstance(index, int) and 0 <= index < len(pending) and documented[pending[index]] is None:
+                self._cache_documentation(pending_keys[index], item)
+                documented[pending[index]] = self._enhance_documentation(pending_elements[index], item, model, tone)
+        
+        # Enhance each element as soon as its JSON object completes in the stream
+        stream_parser = StreamingJSONArrayParser()
+        
+        def on_chunk(text: str):
+            for item in stream_parser.feed(text):
+                dispatch(item)
+        
+        messages = [self._create_batch_documentation_prompt(pending_elements, tone)]
+        async with self._llm_semaphore:
+            result = await self._call_llm(messages, context, on_chunk=on_chunk, model=model, tone=tone)
+        
+        if not result.success:
+            logger.warning(f"Failed to generate batch documentation: {result.errors}")
+            return documented
+        
+        # Pick up anything the streaming parser could not extract
+        for item in result.data.get("elements", []):
+            dispatch(item)
+        
+        # Fall back to single-element calls for anything the batch response missed
+        missing = [i for i in pending if documented[i] is None]
+        if missing:
+            logger.warning(f"Batch response missing {len(missing)} of {len(pending)} elements, retrying individually")
+            retried = await asyncio.gather(
+                *[self._generate_element_documentation(batch[i], model, tone) for i in missing]
+            )
+            for i, doc in zip(missing, retried):
+                documented[i] = doc
+        
+        return documented
+    
+    def _get_cache_key(self, element: DocumentationElement, model: str, tone: str) -> str:
+        """Build a content hash identifying an element's documentation request"""
+        snippet = " ".join(" ".join(element.code_snippets or []).split())
+        key_parts = (
+            element.element_type,
+            element.element_name,
+            ",".join(element.dependencies or []),
+            ",".join(element.related_elements or []),
+            snippet,
+            model,
+            tone
+        )
+        return hashlib.blake2b("\x1f".join(key_parts).encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _get_cached_documentation(self, element: DocumentationElement, model: str, tone: str) -> Optional[Dict[str, Any]]:
+        """Return cached documentation for an element, if any"""
+        cache_key = self._get_cache_key(element, model, tone)
+        llm_data = self._doc_cache.get(cache_key)
+        if llm_data is None:
+            return None
+        self._doc_cache.move_to_end(cache_key)
+        return self._enhance_documentation(element, llm_data, model, tone)
+    
+    def _cache_documentation(self, cache_key: str, llm_data: Dict[str, Any]):
+        """Cache LLM-generated documentation under a key computed before the call, evicting the least recently used entry"""
+        self._doc_cache[cache_key] = llm_data
+        self._doc_cache.move_to_end(cache_key)
+        if len(self._doc_cache) > self.doc_cache_size:
+            self._doc_cache.popitem(last=False)
+    
+    def _format_batch_entry(self, index: int, element: DocumentationElement) -> str:
+        """Format a single element entry for a batch prompt"""
+        entry = (
+            f"[{index}] Element Type: {element.element_type}\n"
+            f"    Element Name: {element.element_name}\n"
+            f"    File Path: {element.file_path}\n"
+            f"    Line Number: {element.line_number or 'Unknown'}"
+        )
+        guidance = self._element_guidance(element.element_type)
+        if guidance:
+            entry += f"\n    Guidance: {guidance}"
+        return entry
+    
+    def _create_batch_documentation_prompt(self, elements: List[DocumentationElement], tone: str) -> HumanMessage:
+        """Create a single prompt documenting several elements at once"""
+        entries = "\n\n".join(
+            self._format_batch_entry(index, element) for index, element in enumerate(elements)
+        )
+        return _prompt_message(
+            _render_instructions("documenter_batch.j2", tone),
+            f"Elements to document ({len(elements)}):\n\n{entries}\n"
+        )
+    
+    def _element_guidance(self, element_type: str) -> str:
+        """Get element-specific documentation guidance"""
+        guidance = {
+            "class": "For classes, focus on the class's purpose, responsibilities, and how it fits into the overall architecture.",
+            "method": "For methods, focus on the method's purpose, parameters, return values, and usage patterns.",
+            "route": "For routes, focus on the endpoint's purpose, HTTP method, expected input/output, and authentication requirements.",
+            "model": "For models, focus on the data structure, relationships, and common operations.",
+            "migration": "For migrations, focus on the database changes, purpose, and rollback considerations."
+        }
+        return guidance.get(element_type, "")
+    
+    def _create_documentation_prompt(self, element: DocumentationElement, tone: str) -> HumanMessage:
+        """Create a prompt for documentation generation"""
+        payload = (
+            f"Element Type: {element.element_type}\n"
+            f"Element Name: {element.element_name}\n"
+            f"File Path: {element.file_path}\n"
+            f"Line Number: {element.line_number or 'Unknown'}\n"
+        )
         
         # Add element-specific guidance
-        if element.element_type == "class":
-            base_prompt += "\n\nFor classes, focus on the class's purpose, responsibilities, and how it fits into the overall architecture."
-        elif element.element_type == "method":
-            base_prompt += "\n\nFor methods, focus on the method's purpose, parameters, return values, and usage patterns."
-        elif element.element_type == "route":
-            base_prompt += "\n\nFor routes, focus on the endpoint's purpose, HTTP method, expected input/output, and authentication requirements."
-        elif element.element_type == "model":
-            base_prompt += "\n\nFor models, focus on the data structure, relationships, and common operations."
-        elif element.element_type == "migration":
-            base_prompt += "\n\nFor migrations, focus on the database changes, purpose, and rollback considerations."
-        
-        return base_prompt
+        guidance = self._element_guidance(element.element_type)
+        if guidance:
+            payload += f"\n{guidance}"
+        
+        return _prompt_message(_render_instructions("documenter_element.j2", tone), payload)
     
-    def _enhance_documentation(self, element: DocumentationElement, llm_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _enhance_documentation(
+        self,
+        element: DocumentationElement,
+        llm_data: Dict[str, Any],
+        model: str,
+        tone: str
+    ) -> Dict[str, Any]:
         """Enhance LLM-generated documentation with additional context"""
         
         enhanced_doc = {
@@ -352,8 +674,8 @@ Format your response as JSON with the following structure:
             "related_elements": llm_data.get("related_elements", []) + (element.related_elements or []),
             "metadata": {
                 "generated_by": "documenter_agent",
-                "model": self.config.model,
-                "tone": self.config.tone,
+                "model": model,
+                "tone": tone,
                 "timestamp": self.last_run.isoformat() if self.last_run else None
             }
         }
@@ -386,42 +708,21 @@ Format your response as JSON with the following structure:
     
     def get_system_prompt(self, tone: str = "professional") -> str:
         """Get the system prompt for the documenter agent"""
-        
-        tone_guidance = {
-            "professional": "Use formal, technical language suitable for professional documentation.",
-            "friendly": "Use approachable, conversational language while maintaining technical accuracy.",
-            "strict": "Use precise, formal language with strict adherence to technical standards.",
-            "mentor": "Use educational language that explains concepts and provides learning opportunities.",
-            "casual": "Use relaxed, informal language while maintaining clarity and usefulness."
-        }
-        
-        return f"""You are an expert PHP developer and technical writer specializing in code documentation.
-
-Your mission is to create clear, comprehensive, and actionable documentation for PHP code elements including classes, methods, functions, routes, models, and migrations.
-
-{tone_guidance.get(tone, tone_guidance['professional'])}
-
-Key principles:
-1. **Clarity**: Explain what the code does in simple terms
-2. **Completeness**: Cover all important aspects (parameters, returns, examples)
-3. **Practicality**: Provide real-world usage examples
-4. **Accuracy**: Ensure all information is technically correct
-5. **Consistency**: Use consistent formatting and terminology
-
-Always structure your responses as JSON and focus on being helpful to developers who will use this code."""
+        return SYSTEM_PROMPTS.get(tone, SYSTEM_PROMPTS["professional"])
     
     def process_response(self, response: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Process the LLM response into structured documentation data"""
         
         try:
-            # Try to parse JSON response
-            if response.strip().startswith('{'):
-                # Extract JSON from the response
-                json_start = response.find('{')
-                json_end = response.rfind('}') + 1
-                json_str = response[json_start:json_end]
-                
-                parsed_data = json.loads(json_str)
+            start = len(response) - len(response.lstrip())
+            
+            # Batch responses are a JSON array of per-element objects
+            if response.startswith('[', start):
+                return {"elements": self._decode_json_array(response, start + 1)}
+            
+            # Decode the leading JSON object, ignoring any trailing text
+            if response.startswith('{', start):
+                parsed_data, _ = _json_decoder.raw_decode(response, start)
                 return parsed_data
             else:
                 # Fallback: try to extract structured information
@@ -435,6 +736,29 @@ Always structure your responses as JSON and focus on being helpful to developers
             logger.error(f"Error processing response: {e}")
             return {"error": f"Failed to process response: {str(e)}"}
     
+    def _decode_json_array(self, response: str, position: int) -> List[Any]:
+        """Decode the objects of a JSON array one at a time, keeping any that parse"""
+        items = []
+        length = len(response)
+        
+        while position < length:
+            # Skip separators between array items
+            while position < length and response[position] in ' \t\r\n,':
+                position += 1
+            if position >= length or response[position] == ']':
+                break
+            
+            try:
+                item, position = _json_decoder.raw_decode(response, position)
+            except json.JSONDecodeError:
+                if not items:
+                    raise
+                logger.warning(f"Truncated batch response, kept {len(items)} elements")
+                break
+            items.append(item)
+        
+        return items
+    
     def _extract_structured_info(self, response: str) -> Dict[str, Any]:
         """Extract structured information from text response"""
         
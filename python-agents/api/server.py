@@ -4,56 +4,79 @@ Provides REST API endpoints for code analysis and agent orchestration
 """
 
 import asyncio
-import json
+import codecs
+import hashlib
 import logging
+import logging.handlers
+import os
+import multiprocessing
+import queue
+import shutil
+import time
 import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Tuple, Any
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+import aiofiles
+import aiofiles.os
 import uvicorn
 
-from orchestrator.graph import AgentOrchestrator
+from agents.base_agent import close_shared_http_client
+from orchestrator.graph import AgentOrchestrator, run_analysis_in_process
 from utils.php_parser import PHPParser
 from utils.database import DatabaseManager
-from utils.redis_client import RedisClient
+from utils.redis_client import RedisClient, AGENT_TEST_CACHE_KEY, PENDING_SESSION_KEY, STATUS_CACHE_KEY, SUMMARY_CACHE_KEY, SESSION_CHANNEL
+from utils.json_utils import json_loads, json_dumps_bytes
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+try:
+    from pymysql.err import MySQLError
+except ImportError:
+    MySQLError = None
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="AgentFlow AI Agents API",
-    description="Multi-Agent AI System for Automated Documentation and Testing",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
+try:
+    from redis.exceptions import RedisError
+except ImportError:
+    RedisError = None
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Configure logging: handlers enqueue records and a background thread writes them out
+log_queue: queue.Queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener.start()
+logger = logging.getLogger(__name__)
 
 # Pydantic models for API requests/responses
+class FileItem(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    path: str
+    content: str
+
+class AgentsConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    documenter: bool = True
+    tester: bool = True
+    security_auditor: bool = True
+    performance_optimizer: bool = True
+
 class ProjectAnalysisRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     project_id: int
-    files: List[Dict[str, str]] = Field(..., description="List of files with path and content")
-    agents_config: Optional[Dict[str, Any]] = Field(
-        default={
-            "documenter": True,
-            "tester": True,
-            "security_auditor": True,
-            "performance_optimizer": True
-        },
+    files: List[FileItem] = Field(..., description="List of files with path and content")
+    agents_config: Optional[AgentsConfig] = Field(
+        default_factory=AgentsConfig,
         description="Configuration for which agents to run"
     )
     model: Optional[str] = Field(default="llama-3-70b", description="LLM model to use")
@@ -77,85 +100,390 @@ class HealthResponse(BaseModel):
     timestamp: str
     services: Dict[str, str]
 
-# Global instances
-orchestrator: Optional[AgentOrchestrator] = None
-db_manager: Optional[DatabaseManager] = None
-redis_client: Optional[RedisClient] = None
+class BatchItem(BaseModel):
+    id: str
+    path: str = Field(..., description="API path of the sub-request, e.g. /analyze")
+    body: Dict[str, Any] = Field(default_factory=dict, description="JSON body of the sub-request")
+
+# Caps on one batch: sub-requests accepted, and how many run at once
+BATCH_MAX_REQUESTS = 32
+BATCH_CONCURRENCY = 8
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(
+        ..., max_length=BATCH_MAX_REQUESTS, description="Sub-requests to dispatch in parallel"
+    )
+
+# Bounded queue of pending analysis jobs
+JOB_QUEUE_SIZE = 256
+
+# How long an accepted session stays staged in Redis before a worker persists it
+PENDING_SESSION_TTL = 300
+
+# Worker processes for running analyses off the serving process (0 runs them in-process).
+# Session events and caches must go through a shared Redis, so this is ignored without REDIS_URL.
+ANALYSIS_PROCESSES = int(os.getenv("ANALYSIS_PROCESSES", "0"))
+
+# "queue" runs analyses on this server's worker tasks, "celery" sends them to Celery workers
+ANALYSIS_BACKEND = os.getenv("ANALYSIS_BACKEND", "queue")
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    global orchestrator, db_manager, redis_client
+if ANALYSIS_BACKEND == "celery":
+    from worker import app as celery_app, run_analysis_task
+
+# Jobs arriving within the batch window are handed to the orchestrator together
+JOB_BATCH_SIZE = 16
+JOB_BATCH_WINDOW = 0.025
+
+async def collect_job_batch(job_queue: asyncio.Queue) -> List[Dict[str, Any]]:
+    """Wait for a job, then gather any others queued within the batch window"""
+    jobs = [await job_queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + JOB_BATCH_WINDOW
+    
+    while len(jobs) < JOB_BATCH_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            jobs.append(await asyncio.wait_for(job_queue.get(), timeout=timeout))
+        except asyncio.TimeoutError:
+            break
+    
+    return jobs
+
+async def analysis_worker(
+    worker_id: int,
+    job_queue: asyncio.Queue,
+    orchestrator: AgentOrchestrator,
+    pool: Optional[Executor] = None
+):
+    """Run queued analysis jobs in micro-batches, in the process pool when one is configured"""
+    loop = asyncio.get_running_loop()
+    while True:
+        jobs = await collect_job_batch(job_queue)
+        try:
+            if pool is not None:
+                results = await loop.run_in_executor(pool, run_analysis_in_process, jobs)
+            elif len(jobs) == 1:
+                results = [await orchestrator.run_analysis(**jobs[0])]
+            else:
+                results = await orchestrator.run_analysis_batch(jobs)
+            
+            for job, result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    logger.error("Analysis worker %s failed on session %s: %s", worker_id, job.get('session_id'), result)
+        except Exception:
+            logger.exception("Analysis worker %s failed on a batch of %s jobs", worker_id, len(jobs))
+        finally:
+            for _ in jobs:
+                job_queue.task_done()
+
+async def stage_pending_session(redis_client: RedisClient, session_id: str, project_id: int, agents_config: Dict[str, Any]):
+    """Record an accepted session in Redis until the orchestrator persists it"""
+    await redis_client.set(
+        PENDING_SESSION_KEY.format(session_id=session_id),
+        {
+            "session_id": session_id,
+            "project_id": project_id,
+            "status": "pending",
+            "agents_config": agents_config,
+            "created_at": datetime.utcnow().isoformat()
+        },
+        expire=PENDING_SESSION_TTL
+    )
+
+# Session status reported for Celery task states before the session row exists
+CELERY_STATUS = {"STARTED": "in_progress", "RETRY": "in_progress", "FAILURE": "failed"}
+
+async def enqueue_analysis(job_queue: asyncio.Queue, job: Dict[str, Any]):
+    """Queue an analysis job, rejecting it when the queue is full"""
+    if ANALYSIS_BACKEND == "celery":
+        # The session id doubles as the task id so status lookups need no extra mapping.
+        # Publishing talks to the broker synchronously, so keep it off the event loop
+        await asyncio.to_thread(run_analysis_task.apply_async, kwargs=job, task_id=job["session_id"])
+        return
     
+    try:
+        job_queue.put_nowait(job)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Analysis queue is full, try again later")
+
+async def start_analysis(redis_client: RedisClient, job_queue: asyncio.Queue, job: Dict[str, Any]):
+    """Stage a session as pending and queue its job, unstaging it if the job cannot be queued"""
+    await stage_pending_session(redis_client, job["session_id"], job["project_id"], job["agents_config"])
+    try:
+        await enqueue_analysis(job_queue, job)
+    except Exception:
+        # Otherwise /status would report "pending" for a session that never runs
+        await redis_client.delete(PENDING_SESSION_KEY.format(session_id=job["session_id"]))
+        raise
+
+def start_analysis_workers(
+    job_queue: asyncio.Queue,
+    orchestrator: AgentOrchestrator
+) -> Tuple[List[asyncio.Task], Optional[Executor]]:
+    """Start the local analysis workers and their process pool; Celery runs analyses elsewhere"""
+    if ANALYSIS_BACKEND == "celery":
+        return [], None
+    
+    pool = None
+    if ANALYSIS_PROCESSES > 0 and not REDIS_URL:
+        # Each child would get a private in-memory store, so its events and caches would never reach this process
+        logger.error("ANALYSIS_PROCESSES requires REDIS_URL; running analyses in-process instead")
+    elif ANALYSIS_PROCESSES > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=ANALYSIS_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info("Running analyses in %s worker processes", ANALYSIS_PROCESSES)
+    
+    workers = [
+        asyncio.create_task(analysis_worker(worker_id, job_queue, orchestrator, pool))
+        for worker_id in range(ANALYSIS_PROCESSES or os.cpu_count() or 1)
+    ]
+    return workers, pool
+
+HEALTH_PROBE_TIMEOUT = 0.5
+HEALTH_CACHE_TTL = 1.0
+health_cache: Dict[str, Any] = {"checked_at": 0.0, "response": None}
+health_lock = asyncio.Lock()
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# When set, uploads are streamed to this directory and read back by the orchestrator.
+# Celery workers may run on other hosts, so with that backend uploads are always sent inline
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR") if ANALYSIS_BACKEND != "celery" else None
+
+# Cache lifetimes (seconds) for read endpoints
+STATUS_CACHE_TTL = 2
+SUMMARY_CACHE_TTL = 60
+AGENT_TEST_CACHE_TTL = 3600
+
+# Seconds between keep-alive comments on idle status streams
+STATUS_STREAM_KEEPALIVE = 15
+
+# Connection pool sizes, tuned to the number of concurrent analysis workers
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "5"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+# Redis server shared by the API and analysis workers; empty keeps storage in memory
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+async def read_upload_text(file: UploadFile) -> str:
+    """Read an uploaded file as UTF-8 text, streaming large files in chunks"""
+    if file.size is not None and file.size <= UPLOAD_CHUNK_SIZE:
+        return (await file.read()).decode('utf-8')
+    
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parts = []
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+async def stage_upload(file: UploadFile, directory: str) -> Dict[str, Any]:
+    """
+    Stream an upload to the staging directory, checking it decodes as UTF-8
+    
+    The file is stored under its content digest and described by
+    path, staged_path, sha and size for the orchestrator to read lazily.
+    """
+    temp_path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                decoder.decode(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+                await f.write(chunk)
+            decoder.decode(b'', final=True)
+    except Exception:
+        await aiofiles.os.remove(temp_path)
+        raise
+    
+    sha = digest.hexdigest()
+    staged_path = os.path.join(directory, sha)
+    await aiofiles.os.replace(temp_path, staged_path)
+    return {
+        "path": file.filename,
+        "staged_path": staged_path,
+        "sha": sha,
+        "size": size
+    }
+
+async def remove_staging_dir(staging_dir: Optional[str]):
+    """Remove a session's staging directory when its uploads will never be analyzed"""
+    if staging_dir is not None:
+        await asyncio.to_thread(shutil.rmtree, staging_dir, ignore_errors=True)
+
+async def warmup(db_manager: DatabaseManager, redis_client: RedisClient):
+    """Round-trip both pools in parallel so the first requests don't pay for connection setup"""
+    await asyncio.gather(db_manager.ping(), redis_client.ping())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup and clean them up on shutdown"""
     try:
         # Initialize database connection
-        db_manager = DatabaseManager()
-        await db_manager.connect()
+        app.state.db_manager = DatabaseManager(pool_min=DB_POOL_MIN, pool_max=DB_POOL_MAX)
+        await app.state.db_manager.connect()
         logger.info("Database connection established")
         
         # Initialize Redis client
-        redis_client = RedisClient()
-        await redis_client.connect()
+        app.state.redis_client = RedisClient(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+        await app.state.redis_client.connect()
         logger.info("Redis connection established")
         
+        await warmup(app.state.db_manager, app.state.redis_client)
+        
         # Initialize agent orchestrator
-        orchestrator = AgentOrchestrator(db_manager, redis_client)
+        app.state.orchestrator = AgentOrchestrator(app.state.db_manager, app.state.redis_client)
         logger.info("Agent orchestrator initialized")
         
+        # The queue stays available to the routes; only the queue backend drains it locally
+        app.state.job_queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+        app.state.analysis_workers, app.state.analysis_pool = start_analysis_workers(
+            app.state.job_queue, app.state.orchestrator
+        )
+        logger.info("Started %s analysis workers", len(app.state.analysis_workers))
+        
     except Exception as e:
-        logger.error(f"Failed to initialize services: {e}")
+        logger.error("Failed to initialize services: %s", e)
         raise
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    if db_manager:
-        await db_manager.close()
-    if redis_client:
-        await redis_client.close()
+    
+    yield
+    
+    # Cleanup on shutdown
+    for worker in app.state.analysis_workers:
+        worker.cancel()
+    await asyncio.gather(*app.state.analysis_workers, return_exceptions=True)
+    if app.state.analysis_pool is not None:
+        app.state.analysis_pool.shutdown(wait=False, cancel_futures=True)
+    
+    await app.state.orchestrator.aclose()
+    await app.state.db_manager.close()
+    await app.state.redis_client.close()
+    await close_shared_http_client()
     logger.info("Services shutdown complete")
+    log_listener.stop()
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="AgentFlow AI Agents API",
+    description="Multi-Agent AI System for Automated Documentation and Testing",
+    version="1.0.0",
+    docs_url="/docs",
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Add CORS middleware with an explicit allowlist (comma-separated ALLOWED_ORIGINS)
+ALLOWED_ORIGINS = tuple(
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:8000").split(",")
+    if origin.strip()
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
+    allow_credentials=True,
+    allow_methods=("GET", "POST"),
+    allow_headers=("Authorization", "Content-Type"),
+)
+
+# Compress larger JSON bodies (status, summaries, agent listings)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Service dependencies
+def _get_service(request: Request, name: str, label: str) -> Any:
+    """Fetch a service from app state, failing with 503 if it was never initialized"""
+    service = getattr(request.app.state, name, None)
+    if service is None:
+        raise HTTPException(status_code=503, detail=f"{label} not available")
+    return service
+
+def get_orchestrator(request: Request) -> AgentOrchestrator:
+    return _get_service(request, "orchestrator", "Agent orchestrator")
+
+def get_db_manager(request: Request) -> DatabaseManager:
+    return _get_service(request, "db_manager", "Database")
+
+def get_redis_client(request: Request) -> RedisClient:
+    return _get_service(request, "redis_client", "Redis")
+
+def get_job_queue(request: Request) -> asyncio.Queue:
+    return _get_service(request, "job_queue", "Analysis queue")
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
+    # Serve a recent healthy response; degraded responses are always re-probed
+    cached = health_cache["response"]
+    if cached and cached.status == "healthy" and time.monotonic() - health_cache["checked_at"] < HEALTH_CACHE_TTL:
+        return cached
+    
+    async with health_lock:
+        cached = health_cache["response"]
+        if cached and cached.status == "healthy" and time.monotonic() - health_cache["checked_at"] < HEALTH_CACHE_TTL:
+            return cached
+        
+        response = await check_services_health(request.app.state)
+        health_cache["response"] = response
+        health_cache["checked_at"] = time.monotonic()
+        return response
+
+async def check_services_health(state: Any) -> HealthResponse:
+    """Probe backing services and build a health response"""
     services_status = {}
     
-    # Check database
-    try:
-        if db_manager:
-            await db_manager.ping()
-            services_status["database"] = "healthy"
-        else:
-            services_status["database"] = "not_initialized"
-    except Exception as e:
-        services_status["database"] = f"unhealthy: {str(e)}"
+    # Probe database and Redis concurrently, each with its own timeout
+    probes = {
+        "database": getattr(state, "db_manager", None),
+        "redis": getattr(state, "redis_client", None)
+    }
+    results = await asyncio.gather(
+        *[
+            asyncio.wait_for(service.ping(), timeout=HEALTH_PROBE_TIMEOUT)
+            for service in probes.values() if service
+        ],
+        return_exceptions=True
+    )
     
-    # Check Redis
-    try:
-        if redis_client:
-            await redis_client.ping()
-            services_status["redis"] = "healthy"
+    probe_results = iter(results)
+    for name, service in probes.items():
+        if not service:
+            services_status[name] = "not_initialized"
+            continue
+        result = next(probe_results)
+        if isinstance(result, asyncio.TimeoutError):
+            services_status[name] = "unhealthy: ping timed out"
+        elif isinstance(result, Exception):
+            services_status[name] = f"unhealthy: {str(result)}"
         else:
-            services_status["redis"] = "not_initialized"
-    except Exception as e:
-        services_status["redis"] = f"unhealthy: {str(e)}"
+            services_status[name] = "healthy"
     
     # Check orchestrator
-    if orchestrator:
+    if getattr(state, "orchestrator", None):
         services_status["orchestrator"] = "healthy"
     else:
         services_status["orchestrator"] = "not_initialized"
     
     return HealthResponse(
-        status="healthy" if all("healthy" in status for status in services_status.values()) else "degraded",
+        status="healthy" if all(status == "healthy" for status in services_status.values()) else "degraded",
         timestamp=datetime.utcnow().isoformat(),
         services=services_status
     )
 
-@app.post("/analyze", response_model=AnalysisResponse)
+@app.post("/analyze", response_model=AnalysisResponse, status_code=202)
 async def analyze_project(
     request: ProjectAnalysisRequest,
-    background_tasks: BackgroundTasks
+    redis_client: RedisClient = Depends(get_redis_client),
+    job_queue: asyncio.Queue = Depends(get_job_queue)
 ):
     """
     Start code analysis with AI agents
@@ -165,83 +493,122 @@ async def analyze_project(
     2. Routes to appropriate AI agents
     3. Collects and aggregates results
     4. Stores analysis in database
+    
+    The session row is persisted by the orchestrator, so the reply
+    does not wait on the database.
     """
-    if not orchestrator:
-        raise HTTPException(status_code=503, detail="Agent orchestrator not available")
+    # Generate session ID
+    session_id = str(uuid.uuid4())
+    estimated_time = len(request.files) * 30  # Rough estimate: 30 seconds per file
     
-    try:
-        # Generate session ID
-        session_id = str(uuid.uuid4())
-        
-        # Create analysis session in database
-        await db_manager.create_analysis_session(
-            project_id=request.project_id,
-            session_uuid=session_id,
-            agents_config=request.agents_config
-        )
-        
-        # Start analysis in background
-        background_tasks.add_task(
-            orchestrator.run_analysis,
-            session_id=session_id,
-            project_id=request.project_id,
-            files=request.files,
-            agents_config=request.agents_config,
-            model=request.model,
-            tone=request.tone
-        )
-        
-        logger.info(f"Analysis started for project {request.project_id}, session {session_id}")
-        
-        return AnalysisResponse(
-            session_id=session_id,
-            status="started",
-            message="Analysis started successfully",
-            estimated_time=len(request.files) * 30  # Rough estimate: 30 seconds per file
-        )
-        
-    except Exception as e:
-        logger.error(f"Failed to start analysis: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to start analysis: {str(e)}")
+    # The orchestrator works on plain dicts
+    agents_config = request.agents_config.model_dump() if request.agents_config else {}
+    
+    # Queue analysis for the worker pool
+    await start_analysis(redis_client, job_queue, {
+        "session_id": session_id,
+        "project_id": request.project_id,
+        "files": [file.model_dump() for file in request.files],
+        "agents_config": agents_config,
+        "model": request.model,
+        "tone": request.tone
+    })
+    
+    logger.info("Analysis started for project %s, session %s", request.project_id, session_id)
+    
+    return AnalysisResponse(
+        session_id=session_id,
+        status="started",
+        message="Analysis started successfully",
+        estimated_time=estimated_time
+    )
 
 @app.get("/status/{session_id}", response_model=AnalysisStatusResponse)
-async def get_analysis_status(session_id: str):
+async def get_analysis_status(
+    session_id: str,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    redis_client: RedisClient = Depends(get_redis_client)
+):
     """Get the current status of an analysis session"""
-    if not db_manager:
-        raise HTTPException(status_code=503, detail="Database not available")
+    cache_key = STATUS_CACHE_KEY.format(session_id=session_id)
+    cached = await redis_client.getb(cache_key)
+    if cached:
+        return Response(content=cached, media_type="application/json")
     
-    try:
-        session = await db_manager.get_analysis_session(session_id)
-        if not session:
-            raise HTTPException(status_code=404, detail="Analysis session not found")
-        
-        # Get progress information
-        progress = await db_manager.get_session_progress(session_id)
-        
-        # Get results if completed
-        results = None
-        if session["status"] == "completed":
-            results = await db_manager.get_session_results(session_id)
-        
-        return AnalysisStatusResponse(
+    # Staged by the API and kept by the worker until the terminal status is written
+    pending = await redis_client.get(PENDING_SESSION_KEY.format(session_id=session_id))
+    if pending:
+        status = pending["status"]
+        if ANALYSIS_BACKEND == "celery":
+            task_state = await asyncio.to_thread(lambda: celery_app.AsyncResult(session_id).state)
+            status = CELERY_STATUS.get(task_state, status)
+        return ORJSONResponse(content=AnalysisStatusResponse(
             session_id=session_id,
-            status=session["status"],
-            progress=progress,
-            results=results,
-            error=session.get("error_message")
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get analysis status: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get analysis status: {str(e)}")
+            status=status,
+            progress={}
+        ).model_dump())
+    
+    session = await db_manager.get_analysis_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Analysis session not found")
+    
+    # Get progress information
+    progress = await db_manager.get_session_progress(session_id)
+    
+    # Get results if completed
+    results = None
+    if session["status"] == "completed":
+        results = await db_manager.get_session_results(session_id)
+    
+    status_response = AnalysisStatusResponse(
+        session_id=session_id,
+        status=session["status"],
+        progress=progress,
+        results=results,
+        error=session.get("error_message")
+    )
+    
+    # Render once, skipping FastAPI's response_model re-validation; the
+    # rendered bytes are cached and served as-is on later hits
+    body = json_dumps_bytes(status_response.model_dump())
+    await redis_client.setb(cache_key, body, expire=STATUS_CACHE_TTL)
+    
+    return Response(content=body, media_type="application/json")
+
+@app.get("/status/{session_id}/stream")
+async def stream_analysis_status(
+    session_id: str,
+    request: Request,
+    redis_client: RedisClient = Depends(get_redis_client)
+):
+    """Stream status updates for an analysis session as Server-Sent Events"""
+    async def event_stream():
+        async with redis_client.subscribe(SESSION_CHANNEL.format(session_id=session_id)) as updates:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(updates.get(), timeout=STATUS_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Comment line keeps idle connections open through proxies
+                    yield b": keep-alive\n\n"
+                    continue
+                
+                yield b"data: " + json_dumps_bytes(message) + b"\n\n"
+                if message.get("status") in ("completed", "failed"):
+                    break
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@app.post("/upload-files")
+@app.post("/upload-files", status_code=202)
 async def upload_files(
     project_id: int,
     files: List[UploadFile] = File(...),
-    agents_config: Optional[str] = None
+    agents_config: Optional[str] = None,
+    redis_client: RedisClient = Depends(get_redis_client),
+    job_queue: asyncio.Queue = Depends(get_job_queue)
 ):
     """
     Upload files for analysis
@@ -249,124 +616,223 @@ async def upload_files(
     Alternative endpoint for file uploads when you have actual files
     instead of file content in JSON
     """
-    if not orchestrator:
-        raise HTTPException(status_code=503, detail="Agent orchestrator not available")
+    # Parse agents config if provided
+    config = {}
+    if agents_config:
+        try:
+            config = AgentsConfig.model_validate_json(agents_config).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid agents_config: {e}")
     
-    try:
-        # Parse agents config if provided
-        config = {}
-        if agents_config:
-            config = json.loads(agents_config)
-        
-        # Process uploaded files
-        file_data = []
-        for file in files:
-            content = await file.read()
-            file_data.append({
-                "path": file.filename,
-                "content": content.decode('utf-8')
-            })
-        
-        # Generate session ID
-        session_id = str(uuid.uuid4())
-        
-        # Create analysis session
-        await db_manager.create_analysis_session(
-            project_id=project_id,
-            session_uuid=session_id,
-            agents_config=config
+    # Generate session ID
+    session_id = str(uuid.uuid4())
+    
+    # Read (or stage) uploaded files concurrently, skipping any that fail to decode
+    staging_dir = None
+    if UPLOAD_STAGING_DIR:
+        staging_dir = os.path.join(UPLOAD_STAGING_DIR, session_id)
+        os.makedirs(staging_dir, exist_ok=True)
+        results = await asyncio.gather(
+            *[stage_upload(file, staging_dir) for file in files],
+            return_exceptions=True
         )
-        
-        # Start analysis
-        asyncio.create_task(
-            orchestrator.run_analysis(
-                session_id=session_id,
-                project_id=project_id,
-                files=file_data,
-                agents_config=config
-            )
+    else:
+        contents = await asyncio.gather(
+            *[read_upload_text(file) for file in files],
+            return_exceptions=True
         )
-        
-        return {
+        results = [
+            content if isinstance(content, Exception) else {"path": file.filename, "content": content}
+            for file, content in zip(files, contents)
+        ]
+    
+    file_data = []
+    skipped_files = []
+    for file, result in zip(files, results):
+        if isinstance(result, Exception):
+            logger.warning("Skipping unreadable upload %s: %s", file.filename, result)
+            skipped_files.append(file.filename)
+            continue
+        file_data.append(result)
+    
+    if not file_data:
+        await remove_staging_dir(staging_dir)
+        raise HTTPException(status_code=400, detail=f"No readable files uploaded: {', '.join(skipped_files)}")
+    
+    # Queue analysis for the worker pool
+    try:
+        await start_analysis(redis_client, job_queue, {
             "session_id": session_id,
-            "status": "started",
-            "files_uploaded": len(files),
-            "message": "File upload and analysis started successfully"
-        }
-        
-    except Exception as e:
-        logger.error(f"Failed to upload files: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to upload files: {str(e)}")
+            "project_id": project_id,
+            "files": file_data,
+            "agents_config": config
+        })
+    except Exception:
+        await remove_staging_dir(staging_dir)
+        raise
+    
+    return {
+        "session_id": session_id,
+        "status": "started",
+        "files_uploaded": len(file_data),
+        "skipped_files": skipped_files,
+        "message": "File upload and analysis started successfully"
+    }
 
 @app.get("/projects/{project_id}/summary")
-async def get_project_summary(project_id: int):
+async def get_project_summary(
+    project_id: int,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    redis_client: RedisClient = Depends(get_redis_client)
+):
     """Get a summary of analysis results for a project"""
-    if not db_manager:
-        raise HTTPException(status_code=503, detail="Database not available")
+    cache_key = SUMMARY_CACHE_KEY.format(project_id=project_id)
+    cached = await redis_client.get(cache_key)
+    if cached:
+        return cached
     
-    try:
-        summary = await db_manager.get_project_summary(project_id)
-        if not summary:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        return summary
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get project summary: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get project summary: {str(e)}")
+    summary = await db_manager.get_project_summary(project_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    await redis_client.set(cache_key, summary, expire=SUMMARY_CACHE_TTL)
+    
+    return summary
+
+# Fixed outer structure of /agents/status; only the agent statuses are serialized per request
+AGENTS_STATUS_ENVELOPE = b'{"agents":%s,"total_agents":%d,"active_agents":%d}'
 
 @app.get("/agents/status")
-async def get_agents_status():
+async def get_agents_status(orchestrator: AgentOrchestrator = Depends(get_orchestrator)):
     """Get the status of all AI agents"""
-    if not orchestrator:
-        raise HTTPException(status_code=503, detail="Agent orchestrator not available")
-    
-    try:
-        return {
-            "agents": orchestrator.get_agents_status(),
-            "total_agents": len(orchestrator.agents),
-            "active_agents": len([a for a in orchestrator.agents.values() if a.is_active])
-        }
-    except Exception as e:
-        logger.error(f"Failed to get agents status: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get agents status: {str(e)}")
+    content = AGENTS_STATUS_ENVELOPE % (
+        json_dumps_bytes(orchestrator.get_agents_status()),
+        len(orchestrator.agents),
+        sum(1 for agent in orchestrator.agents.values() if agent.is_active)
+    )
+    return Response(content=content, media_type="application/json")
+
+def normalize_test_data(value: Any) -> Any:
+    """Collapse whitespace in string values so near-duplicate payloads share a cache entry"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {key: normalize_test_data(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize_test_data(item) for item in value]
+    return value
+
+def agent_test_cache_key(agent_type: str, model: str, test_data: Dict[str, Any]) -> str:
+    """Build the cache key for an agent test payload"""
+    payload = json_dumps_bytes([model, normalize_test_data(test_data)], sort_keys=True)
+    digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    return AGENT_TEST_CACHE_KEY.format(agent_type=agent_type, digest=digest)
 
 @app.post("/agents/{agent_type}/test")
-async def test_agent(agent_type: str, test_data: Dict[str, Any]):
-    """Test a specific agent with sample data"""
-    if not orchestrator:
-        raise HTTPException(status_code=503, detail="Agent orchestrator not available")
+async def test_agent(
+    agent_type: str,
+    test_data: Dict[str, Any],
+    no_cache: bool = False,
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator),
+    redis_client: RedisClient = Depends(get_redis_client)
+):
+    """Test a specific agent with sample data, reusing results for equivalent payloads"""
+    if agent_type not in orchestrator.agents:
+        raise HTTPException(status_code=404, detail=f"Agent type '{agent_type}' not found")
     
-    try:
-        if agent_type not in orchestrator.agents:
-            raise HTTPException(status_code=404, detail=f"Agent type '{agent_type}' not found")
-        
-        agent = orchestrator.agents[agent_type]
+    agent = orchestrator.agents[agent_type]
+    cache_key = agent_test_cache_key(agent_type, agent.config.model, test_data)
+    
+    result = None if no_cache else await redis_client.get(cache_key, use_l1=True)
+    if result is None:
         result = await agent.test_agent(test_data)
-        
-        return {
-            "agent_type": agent_type,
-            "test_result": result,
-            "status": "success"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to test agent {agent_type}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to test agent: {str(e)}")
-
-# Error handlers
-@app.exception_handler(Exception)
-async def global_exception_handler(request, exc):
-    """Global exception handler"""
-    logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={"detail": "Internal server error", "error": str(exc)}
-    )
+        if result.get("success"):
+            await redis_client.set(cache_key, result, expire=AGENT_TEST_CACHE_TTL)
+    
+    return {
+        "agent_type": agent_type,
+        "test_result": result,
+        "status": "success"
+    }
+
+@app.post("/batch")
+async def batch(request: BatchRequest, http_request: Request):
+    """
+    Dispatch several API requests in one round trip
+    
+    Supported paths: /analyze, /status/{session_id},
+    /projects/{project_id}/summary and /agents/{agent_type}/test
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def dispatch(item: BatchItem) -> Dict[str, Any]:
+        async with semaphore:
+            return await dispatch_batch_item(item, http_request)
+    
+    results = await asyncio.gather(*[dispatch(item) for item in request.requests])
+    return {"responses": results}
+
+async def dispatch_batch_item(item: BatchItem, request: Request) -> Dict[str, Any]:
+    """Route a batch sub-request to its endpoint handler"""
+    segments = item.path.strip("/").split("/")
+    
+    # Mirror the status code each endpoint returns on its own
+    status = 202 if segments == ["analyze"] else 200
+    try:
+        if segments == ["analyze"]:
+            result = await analyze_project(
+                ProjectAnalysisRequest.model_validate(item.body),
+                redis_client=get_redis_client(request),
+                job_queue=get_job_queue(request)
+            )
+        elif len(segments) == 2 and segments[0] == "status":
+            result = await get_analysis_status(
+                segments[1],
+                db_manager=get_db_manager(request),
+                redis_client=get_redis_client(request)
+            )
+        elif len(segments) == 3 and segments[0] == "projects" and segments[2] == "summary":
+            result = await get_project_summary(
+                int(segments[1]),
+                db_manager=get_db_manager(request),
+                redis_client=get_redis_client(request)
+            )
+        elif len(segments) == 3 and segments[0] == "agents" and segments[2] == "test":
+            result = await test_agent(
+                segments[1],
+                item.body,
+                orchestrator=get_orchestrator(request),
+                redis_client=get_redis_client(request)
+            )
+        else:
+            return {"id": item.id, "status": 404, "body": {"detail": f"Unsupported batch path '{item.path}'"}}
+    except HTTPException as e:
+        return {"id": item.id, "status": e.status_code, "body": {"detail": e.detail}}
+    except ValidationError as e:
+        return {"id": item.id, "status": 422, "body": {"detail": e.errors(include_url=False)}}
+    except ValueError as e:
+        return {"id": item.id, "status": 400, "body": {"detail": str(e)}}
+    
+    if isinstance(result, BaseModel):
+        result = result.model_dump()
+    elif isinstance(result, Response):
+        result = json_loads(result.body)
+    return {"id": item.id, "status": status, "body": result}
+
+# Error handlers for backing-service failures; anything else uses Starlette's default 500
+if MySQLError is not None:
+    @app.exception_handler(MySQLError)
+    async def database_exception_handler(request: Request, exc: MySQLError):
+        """Database errors are logged, not echoed to the client"""
+        logger.error("Database error on %s: %s", request.url.path, exc)
+        return ORJSONResponse(status_code=503, content={"detail": "Database unavailable"})
+
+if RedisError is not None:
+    @app.exception_handler(RedisError)
+    async def redis_exception_handler(request: Request, exc: RedisError):
+        """Redis errors are logged, not echoed to the client"""
+        logger.error("Redis error on %s: %s", request.url.path, exc)
+        return ORJSONResponse(status_code=503, content={"detail": "Cache unavailable"})
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -374,5 +840,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=5000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        limit_concurrency=1000,
+        timeout_keep_alive=30
     )
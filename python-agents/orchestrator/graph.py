@@ -4,13 +4,18 @@ Coordinates multiple AI agents for comprehensive code analysis
 """
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from types import MappingProxyType
 
+import aiofiles
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langchain_core.messages import HumanMessage, AIMessage
@@ -22,33 +27,78 @@ from agents.documenter import DocumenterAgent
 # from agents.performance_optimizer import PerformanceOptimizerAgent
 from utils.php_parser import PHPParser
 from utils.database import DatabaseManager
-from utils.redis_client import RedisClient
+from utils.json_utils import json_dumps, json_dumps_bytes
+from utils.redis_client import ANALYSIS_CACHE_KEY, PARSED_CACHE_KEY, PENDING_SESSION_KEY, RedisClient, STATUS_CACHE_KEY, SUMMARY_CACHE_KEY, SESSION_CHANNEL
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Parser output is deterministic, so cached entries only need to age out
+PARSED_CACHE_TTL = 86400
+
+# How long a finished analysis can be reused for identical inputs
+ANALYSIS_CACHE_TTL = 3600
+
+# How long a running session's in_progress marker and snapshot outlive a crashed worker
+RUNNING_SESSION_TTL = 3600
+
+# Seconds between write-behind flushes of active session snapshots to Redis
+SESSION_FLUSH_INTERVAL = 0.25
+
+# PHPParser method for each supported file suffix, used by _dispatch_parse
+PARSE_DISPATCH = {
+    "php": "parse_file"
+}
+
+# agent_outputs.output_type for each agent
+OUTPUT_TYPES = MappingProxyType({
+    "documenter": "documentation",
+    "tester": "tests",
+    "security_auditor": "security_report",
+    "performance_optimizer": "performance_report"
+})
+
+def _file_suffix(file_path: str) -> str:
+    """Lowercased extension of a path, without the dot"""
+    _, dot, suffix = file_path.rpartition(".")
+    return suffix.lower() if dot else ""
+
+@dataclass(slots=True, kw_only=True)
 class AnalysisState:
     """State object for the analysis workflow"""
     session_id: str
     project_id: int
     files: List[Dict[str, str]] = field(default_factory=list)
+    model: str = ""
+    tone: str = ""
+    agents_config: Dict[str, bool] = field(default_factory=dict)
     parsed_elements: Dict[str, Any] = field(default_factory=dict)
     agent_outputs: Dict[str, Any] = field(default_factory=dict)
     current_agent: Optional[str] = None
     errors: List[str] = field(default_factory=list)
+    fatal: bool = False  # set when parsing failed for every supported file; partial failures are only reported
     progress: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert state to dictionary for storage"""
+        """Convert state to dictionary for storage, leaving out file contents"""
         return {
             "session_id": self.session_id,
             "project_id": self.project_id,
-            "files": self.files,
-            "parsed_elements": self.parsed_elements,
+            "files": [
+                {key: value for key, value in file_data.items() if key != "content"}
+                for file_data in self.files
+            ],
+            "model": self.model,
+            "tone": self.tone,
+            "agents_config": self.agents_config,
+            "parsed_elements": {
+                file_path: {key: value for key, value in elements.items() if key != "content"}
+                for file_path, elements in self.parsed_elements.items()
+            },
             "agent_outputs": self.agent_outputs,
             "current_agent": self.current_agent,
             "errors": self.errors,
+            "fatal": self.fatal,
             "progress": self.progress,
             "metadata": self.metadata
         }
@@ -64,11 +114,25 @@ class AgentOrchestrator:
     - Error handling and recovery
     """
     
-    def __init__(self, db_manager: DatabaseManager, redis_client: RedisClient):
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        redis_client: RedisClient,
+        cpu_pool: Optional[Executor] = None
+    ):
         self.db_manager = db_manager
         self.redis_client = redis_client
         self.php_parser = PHPParser()
         
+        # Bounds on files parsed and agents run at once
+        self._parse_sem = asyncio.Semaphore(int(os.getenv("PARSE_CONCURRENCY", "8")))
+        self._agent_sem = asyncio.Semaphore(int(os.getenv("AGENT_CONCURRENCY", "4")))
+        
+        # Pool for agents' CPU-bound steps, owned by this orchestrator. Defaults
+        # to one process per CPU (started on first use); orchestrators that
+        # already run in a worker process pass a thread pool instead
+        self._cpu_pool = cpu_pool or ProcessPoolExecutor(max_workers=os.cpu_count())
+        
         # Initialize AI agents
         self.agents = {
             "documenter": DocumenterAgent(),
@@ -80,10 +144,12 @@ class AgentOrchestrator:
         # Build the workflow graph
         self.workflow = self._build_workflow()
         
-        # Track active sessions
+        # Track active sessions; snapshots reach Redis via a write-behind flush
         self.active_sessions: Dict[str, AnalysisState] = {}
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
         
-        logger.info(f"AgentOrchestrator initialized with {len(self.agents)} agents")
+        logger.info("AgentOrchestrator initialized with %s agents", len(self.agents))
     
     def _build_workflow(self) -> StateGraph:
         """Build the LangGraph workflow"""
@@ -94,10 +160,7 @@ class AgentOrchestrator:
         # Add nodes for each step
         workflow.add_node("parse_code", self._parse_code)
         workflow.add_node("route_to_agents", self._route_to_agents)
-        workflow.add_node("run_documenter", self._run_documenter)
-        # workflow.add_node("run_tester", self._run_tester)
-        # workflow.add_node("run_security_auditor", self._run_security_auditor)
-        # workflow.add_node("run_performance_optimizer", self._run_performance_optimizer)
+        workflow.add_node("run_agents", self._run_all_agents)
         workflow.add_node("collect_results", self._collect_results)
         workflow.add_node("store_results", self._store_results)
         workflow.add_node("handle_errors", self._handle_errors)
@@ -105,13 +168,8 @@ class AgentOrchestrator:
         # Define the workflow edges
         workflow.set_entry_point("parse_code")
         
-        # Main flow
-        workflow.add_edge("parse_code", "route_to_agents")
-        workflow.add_edge("route_to_agents", "run_documenter")
-        # workflow.add_edge("run_documenter", "run_tester")
-        # workflow.add_edge("run_tester", "run_security_auditor")
-        # workflow.add_edge("run_security_auditor", "run_performance_optimizer")
-        workflow.add_edge("run_documenter", "collect_results")
+        # Main flow; parse_code and route_to_agents leave through the conditional edges below
+        workflow.add_edge("run_agents", "collect_results")
         workflow.add_edge("collect_results", "store_results")
         workflow.add_edge("store_results", END)
         
@@ -128,9 +186,23 @@ class AgentOrchestrator:
             }
         )
         
+        # Skip the agent fan-out entirely when the session enables no agents
+        workflow.add_conditional_edges(
+            "route_to_agents",
+            self._select_agents,
+            {
+                "run": "run_agents",
+                "none": "collect_results"
+            }
+        )
+        
         # Compile the workflow
         return workflow.compile()
     
+    async def aclose(self):
+        """Shut down the CPU pool"""
+        await asyncio.to_thread(self._cpu_pool.shutdown, wait=True, cancel_futures=True)
+    
     async def run_analysis(
         self,
         session_id: str,
@@ -146,7 +218,8 @@ class AgentOrchestrator:
         Args:
             session_id: Unique session identifier
             project_id: Database project ID
-            files: List of files with path and content
+            files: Files with path and content, or staged upload descriptors
+                (path, staged_path, sha, size) whose content is read lazily
             agents_config: Which agents to run
             model: LLM model to use
             tone: Tone for agent responses
@@ -155,45 +228,96 @@ class AgentOrchestrator:
             Analysis results and metadata
         """
         try:
-            logger.info(f"Starting analysis for session {session_id}, project {project_id}")
+            logger.info("Starting analysis for session %s, project %s", session_id, project_id)
             
-            # Update session status
-            await self.db_manager.update_session_status(session_id, "in_progress")
+            # Persist the session row staged by the API
+            await self.db_manager.create_analysis_session(
+                project_id=project_id,
+                session_uuid=session_id,
+                agents_config=agents_config or {}
+            )
+            # The session row is written once, in its terminal state; until then
+            # the staged pending key reports the run as in progress
+            pending_key = PENDING_SESSION_KEY.format(session_id=session_id)
+            await self.redis_client.set(pending_key, {
+                "session_id": session_id,
+                "project_id": project_id,
+                "status": "in_progress",
+                "agents_config": agents_config or {},
+                "started_at": datetime.utcnow().isoformat()
+            }, expire=RUNNING_SESSION_TTL)
+            await self._invalidate_cached_reads(session_id)
+            
+            # Reuse the outputs of an identical analysis if one finished recently
+            analysis_key = ANALYSIS_CACHE_KEY.format(
+                fingerprint=self._analysis_fingerprint(project_id, files, agents_config, model, tone)
+            )
+            # Keyed by a digest of the inputs, so a cached entry never changes
+            cached_outputs = await self.redis_client.get(analysis_key, use_l1=True)
+            if cached_outputs is not None:
+                logger.info("Reusing cached analysis for session %s", session_id)
+                cached_outputs = self._rebind_cached_outputs(cached_outputs, session_id)
+                await self.db_manager.store_agent_outputs_bulk(
+                    self._build_output_rows(project_id, cached_outputs)
+                )
+                await self.db_manager.update_session_status(session_id, "completed")
+                await self.redis_client.delete(pending_key)
+                await self._invalidate_cached_reads(session_id, project_id)
+                await self._publish_status(session_id, "completed")
+                await self._remove_staged_files(files)
+                return cached_outputs
             
             # Initialize analysis state
             state = AnalysisState(
                 session_id=session_id,
                 project_id=project_id,
                 files=files,
-                metadata={
-                    "model": model,
-                    "tone": tone,
-                    "agents_config": agents_config or {},
-                    "started_at": datetime.utcnow().isoformat()
-                }
+                model=model,
+                tone=tone,
+                agents_config=agents_config or {},
+                metadata={"started_at": datetime.utcnow().isoformat()}
             )
             
             # Store state in memory and Redis
             self.active_sessions[session_id] = state
-            await self.redis_client.set(f"session:{session_id}", state.to_dict())
+            self._mark_dirty(session_id)
             
             # Run the workflow
             config = {"configurable": {"thread_id": session_id}}
             result = await self.workflow.ainvoke(state, config)
+            if isinstance(result, dict):
+                # The compiled graph returns the final channel values rather than the state object
+                result = AnalysisState(**result)
             
             # Update final status
-            await self.db_manager.update_session_status(session_id, "completed")
-            
-            logger.info(f"Analysis completed for session {session_id}")
-            
-            # Cleanup
+            if result.fatal:
+                error_summary = "; ".join(result.errors)
+                await self.db_manager.update_session_status(session_id, "failed", error_message=error_summary)
+                await self.redis_client.delete(pending_key)
+                await self._invalidate_cached_reads(session_id)
+                await self._publish_status(session_id, "failed", result, error=error_summary)
+                logger.info("Analysis failed for session %s: %s", session_id, error_summary)
+            else:
+                await self.db_manager.update_session_status(session_id, "completed")
+                await self.redis_client.delete(pending_key)
+                await self._invalidate_cached_reads(session_id, project_id)
+                await self._publish_status(session_id, "completed", result)
+                logger.info("Analysis completed for session %s", session_id)
+            
+            # Cleanup, caching the outputs in the same transaction
             del self.active_sessions[session_id]
-            await self.redis_client.delete(f"session:{session_id}")
+            self._dirty.discard(session_id)
+            with self.redis_client.pipeline() as pipe:
+                if not result.errors and self._outputs_cacheable(result.agent_outputs):
+                    pipe.set(analysis_key, result.agent_outputs, expire=ANALYSIS_CACHE_TTL)
+                pipe.delete(f"session:{session_id}")
+                await pipe.execute()
+            await self._remove_staged_files(files)
             
             return result.agent_outputs
             
         except Exception as e:
-            logger.error(f"Analysis failed for session {session_id}: {e}")
+            logger.error("Analysis failed for session %s: %s", session_id, e)
             
             # Update session status
             await self.db_manager.update_session_status(
@@ -201,214 +325,274 @@ class AgentOrchestrator:
                 "failed", 
                 error_message=str(e)
             )
+            await self.redis_client.delete(PENDING_SESSION_KEY.format(session_id=session_id))
+            await self._invalidate_cached_reads(session_id)
+            await self._publish_status(session_id, "failed", error=str(e))
             
             # Cleanup
             if session_id in self.active_sessions:
                 del self.active_sessions[session_id]
+            self._dirty.discard(session_id)
             await self.redis_client.delete(f"session:{session_id}")
+            await self._remove_staged_files(files)
             
             raise
     
+    async def run_analysis_batch(self, jobs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Run several analysis jobs together
+        
+        Sessions in a batch share the same agent instances, so identical
+        elements across sessions are served from the documenter's cache.
+        Each session's model and tone are passed to the agents per call
+        rather than set on their shared config.
+        
+        Args:
+            jobs: Keyword arguments for run_analysis, one dict per session
+        
+        Returns:
+            Results (or exceptions) in the same order as jobs
+        """
+        logger.info("Starting analysis batch of %s sessions", len(jobs))
+        return await asyncio.gather(
+            *[self.run_analysis(**job) for job in jobs],
+            return_exceptions=True
+        )
+    
+    def _outputs_cacheable(self, agent_outputs: Dict[str, Any]) -> bool:
+        """Whether every agent succeeded with a non-empty result, so replaying it is safe"""
+        for agent_type, output in agent_outputs.items():
+            if agent_type == "aggregated":
+                continue
+            if not getattr(output, "success", False) or not output.data:
+                return False
+            # e.g. a documenter run where every LLM batch failed
+            metadata = output.metadata or {}
+            if metadata.get("elements_processed") and not metadata.get("elements_documented"):
+                return False
+        return True
+    
+    def _rebind_cached_outputs(self, agent_outputs: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Copy of cached outputs whose aggregate describes the current session"""
+        agent_outputs = dict(agent_outputs)
+        aggregated = agent_outputs.get("aggregated")
+        if aggregated is not None:
+            agent_outputs["aggregated"] = {
+                **aggregated,
+                "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        return agent_outputs
+    
+    async def _read_staged_file(self, staged_path: str) -> str:
+        """Read an upload staged to disk by the API, byte for byte (no newline translation)"""
+        async with aiofiles.open(staged_path, "rb") as f:
+            return (await f.read()).decode("utf-8")
+    
+    async def _remove_staged_files(self, files: List[Dict[str, Any]]):
+        """Delete a session's staged uploads and their directory once it has finished"""
+        staged_paths = {file_data["staged_path"] for file_data in files if file_data.get("staged_path")}
+        for staged_path in staged_paths:
+            try:
+                await asyncio.to_thread(os.remove, staged_path)
+            except FileNotFoundError:
+                pass
+        
+        for directory in {os.path.dirname(staged_path) for staged_path in staged_paths}:
+            try:
+                await asyncio.to_thread(os.rmdir, directory)
+            except OSError:
+                pass
+    
+    def _file_sha(self, file_data: Dict[str, Any]) -> Optional[str]:
+        """Content digest of a file: staged uploads carry it, inline content is hashed here"""
+        sha = file_data.get("sha")
+        if sha is None:
+            content = file_data.get("content")
+            if content is None:
+                return None
+            sha = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+            file_data["sha"] = sha
+        return sha
+    
+    def _analysis_fingerprint(
+        self,
+        project_id: int,
+        files: List[Dict[str, Any]],
+        agents_config: Optional[Dict[str, bool]],
+        model: str,
+        tone: str
+    ) -> str:
+        """Digest of everything that determines an analysis' outputs"""
+        payload = json_dumps_bytes({
+            "project_id": project_id,
+            "files": sorted((file_data.get("path", ""), self._file_sha(file_data)) for file_data in files),
+            "agents_config": agents_config or {},
+            "model": model,
+            "tone": tone
+        }, sort_keys=True)
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    def _parsed_cache_key(self, file_data: Dict[str, Any]) -> Optional[str]:
+        """Content-addressed cache key for a parseable file, or None"""
+        suffix = _file_suffix(file_data.get("path", ""))
+        if suffix not in PARSE_DISPATCH:
+            return None
+        
+        sha = self._file_sha(file_data)
+        if sha is None:
+            return None
+        
+        return PARSED_CACHE_KEY.format(digest=f"{suffix}:{sha}")
+    
+    async def _dispatch_parse(self, file_path: str, file_content: str) -> Optional[Dict[str, Any]]:
+        """Parse one file with the parser for its type, or return None if unsupported"""
+        method = PARSE_DISPATCH.get(_file_suffix(file_path))
+        if method is None:
+            return None
+        # Parsing is synchronous and CPU-bound, so keep it off the event loop
+        return await asyncio.to_thread(getattr(self.php_parser, method), file_content)
+    
     async def _parse_code(self, state: AnalysisState) -> AnalysisState:
         """Parse uploaded code files to extract structural elements"""
         try:
-            logger.info(f"Parsing code for session {state.session_id}")
+            logger.info("Parsing code for session %s", state.session_id)
             
             state.current_agent = "parser"
             state.progress["parsing"] = {"status": "started", "files_processed": 0}
             
-            parsed_elements = {}
+            # Look up previously parsed content in one round trip
+            cache_keys = [self._parsed_cache_key(file_data) for file_data in state.files]
+            lookup_keys = [key for key in cache_keys if key is not None]
+            cached = dict(zip(lookup_keys, await self.redis_client.mget(lookup_keys, use_l1=True)))
+            fresh: Dict[str, Any] = {}
+            
+            async def parse_one(file_data: Dict[str, Any], cache_key: Optional[str]) -> Tuple[str, Any]:
+                file_path = file_data["path"]
+                if _file_suffix(file_path) not in PARSE_DISPATCH:
+                    state.progress["parsing"]["files_processed"] += 1
+                    return file_path, None
+                
+                elements = cached.get(cache_key) if cache_key else None
+                async with self._parse_sem:
+                    # Staged content is read only here; agents get it alongside the parsed elements
+                    content = file_data.get("content")
+                    if content is None:
+                        content = await self._read_staged_file(file_data["staged_path"])
+                    if elements is None:
+                        elements = await self._dispatch_parse(file_path, content)
+                        if cache_key:
+                            fresh[cache_key] = elements
+                state.progress["parsing"]["files_processed"] += 1
+                # A new dict, so cached parser output is never mutated
+                return file_path, {**elements, "content": content}
+            
+            # Parse the remaining files concurrently, bounded by the parse semaphore
+            results = await asyncio.gather(
+                *[parse_one(file_data, key) for file_data, key in zip(state.files, cache_keys)],
+                return_exceptions=True
+            )
             
-            for i, file_data in enumerate(state.files):
-                try:
-                    file_path = file_data["path"]
-                    file_content = file_data["content"]
-                    
-                    # Parse PHP files
-                    if file_path.endswith('.php'):
-                        elements = await self.php_parser.parse_php_file(file_content, file_path)
-                        parsed_elements[file_path] = elements
-                    
-                    # Parse other file types as needed
-                    elif file_path.endswith(('.js', '.vue')):
-                        elements = await self.php_parser.parse_js_file(file_content, file_path)
-                        parsed_elements[file_path] = elements
-                    
-                    state.progress["parsing"]["files_processed"] = i + 1
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to parse file {file_data['path']}: {e}")
-                    state.errors.append(f"Parse error in {file_data['path']}: {str(e)}")
+            # Cache newly parsed files in one round trip
+            if fresh:
+                await self.redis_client.mset(fresh, expire=PARSED_CACHE_TTL)
+            
+            parsed_elements = {}
+            failures = 0
+            for file_data, result in zip(state.files, results):
+                if isinstance(result, Exception):
+                    logger.warning("Failed to parse file %s: %s", file_data['path'], result)
+                    state.errors.append(f"Parse error in {file_data['path']}: {str(result)}")
+                    failures += 1
+                    continue
+                
+                file_path, elements = result
+                if elements is not None:
+                    parsed_elements[file_path] = elements
             
             state.parsed_elements = parsed_elements
+            # Sessions without supported files carry on; only give up when
+            # files were parsed and every one of them failed
+            state.fatal = failures > 0 and not parsed_elements
             state.progress["parsing"]["status"] = "completed"
+            self._mark_dirty(state.session_id)
+            await self._publish_status(state.session_id, "in_progress", state)
             
-            logger.info(f"Code parsing completed for session {state.session_id}")
+            logger.info("Code parsing completed for session %s", state.session_id)
             return state
             
         except Exception as e:
-            logger.error(f"Code parsing failed: {e}")
+            logger.error("Code parsing failed: %s", e)
             state.errors.append(f"Code parsing failed: {str(e)}")
+            state.fatal = True
             return state
     
     async def _route_to_agents(self, state: AnalysisState) -> AnalysisState:
         """Route parsed code to appropriate agents based on configuration"""
         try:
-            logger.info(f"Routing to agents for session {state.session_id}")
+            logger.info("Routing to agents for session %s", state.session_id)
             
             state.current_agent = "router"
             state.progress["routing"] = {"status": "started"}
             
             # Determine which agents to run based on configuration
-            agents_to_run = state.metadata.get("agents_config", {})
+            # Default to all agents if no config provided
+            agents_to_run = list(state.agents_config or self.agents)
             
-            if not agents_to_run:
-                # Default to all agents if no config provided
-                agents_to_run = {name: True for name in self.agents.keys()}
-            
-            state.progress["routing"]["agents_to_run"] = list(agents_to_run.keys())
+            state.progress["routing"]["agents_to_run"] = agents_to_run
             state.progress["routing"]["status"] = "completed"
+            self._mark_dirty(state.session_id)
+            await self._publish_status(state.session_id, "in_progress", state)
             
-            logger.info(f"Routing completed for session {state.session_id}")
+            logger.info("Routing completed for session %s", state.session_id)
             return state
             
         except Exception as e:
-            logger.error(f"Agent routing failed: {e}")
+            logger.error("Agent routing failed: %s", e)
             state.errors.append(f"Agent routing failed: {str(e)}")
             return state
     
-    async def _run_documenter(self, state: AnalysisState) -> AnalysisState:
-        """Run the documenter agent"""
-        try:
-            if not state.metadata.get("agents_config", {}).get("documenter", True):
-                logger.info(f"Skipping documenter for session {state.session_id}")
-                return state
-            
-            logger.info(f"Running documenter agent for session {state.session_id}")
-            
-            state.current_agent = "documenter"
-            state.progress["documenter"] = {"status": "started"}
-            
-            # Run documenter agent
-            documenter = self.agents["documenter"]
-            results = await documenter.analyze(
-                parsed_elements=state.parsed_elements,
-                project_id=state.project_id,
-                model=state.metadata.get("model"),
-                tone=state.metadata.get("tone")
-            )
-            
-            state.agent_outputs["documenter"] = results
-            state.progress["documenter"]["status"] = "completed"
-            
-            logger.info(f"Documenter agent completed for session {state.session_id}")
-            return state
-            
-        except Exception as e:
-            logger.error(f"Documenter agent failed: {e}")
-            state.errors.append(f"Documenter agent failed: {str(e)}")
-            return state
-    
-    async def _run_tester(self, state: AnalysisState) -> AnalysisState:
-        """Run the tester agent"""
-        try:
-            if not state.metadata.get("agents_config", {}).get("tester", True):
-                logger.info(f"Skipping tester for session {state.session_id}")
-                return state
-            
-            logger.info(f"Running tester agent for session {state.session_id}")
-            
-            state.current_agent = "tester"
-            state.progress["tester"] = {"status": "started"}
-            
-            # Run tester agent
-            tester = self.agents["tester"]
-            results = await tester.analyze(
-                parsed_elements=state.parsed_elements,
-                project_id=state.project_id,
-                model=state.metadata.get("model"),
-                tone=state.metadata.get("tone")
-            )
-            
-            state.agent_outputs["tester"] = results
-            state.progress["tester"]["status"] = "completed"
-            
-            logger.info(f"Tester agent completed for session {state.session_id}")
-            return state
-            
-        except Exception as e:
-            logger.error(f"Tester agent failed: {e}")
-            state.errors.append(f"Tester agent failed: {str(e)}")
-            return state
-    
-    async def _run_security_auditor(self, state: AnalysisState) -> AnalysisState:
-        """Run the security auditor agent"""
-        try:
-            if not state.metadata.get("agents_config", {}).get("security_auditor", True):
-                logger.info(f"Skipping security auditor for session {state.session_id}")
-                return state
-            
-            logger.info(f"Running security auditor agent for session {state.session_id}")
-            
-            state.current_agent = "security_auditor"
-            state.progress["security_auditor"] = {"status": "started"}
-            
-            # Run security auditor agent
-            auditor = self.agents["security_auditor"]
-            results = await auditor.analyze(
-                parsed_elements=state.parsed_elements,
-                project_id=state.project_id,
-                model=state.metadata.get("model"),
-                tone=state.metadata.get("tone")
-            )
-            
-            state.agent_outputs["security_auditor"] = results
-            state.progress["security_auditor"]["status"] = "completed"
-            
-            logger.info(f"Security auditor agent completed for session {state.session_id}")
-            return state
-            
-        except Exception as e:
-            logger.error(f"Security auditor agent failed: {e}")
-            state.errors.append(f"Security auditor agent failed: {str(e)}")
-            return state
-    
-    async def _run_performance_optimizer(self, state: AnalysisState) -> AnalysisState:
-        """Run the performance optimizer agent"""
-        try:
-            if not state.metadata.get("agents_config", {}).get("performance_optimizer", True):
-                logger.info(f"Skipping performance optimizer for session {state.session_id}")
-                return state
-            
-            logger.info(f"Running performance optimizer agent for session {state.session_id}")
-            
-            state.current_agent = "performance_optimizer"
-            state.progress["performance_optimizer"] = {"status": "started"}
-            
-            # Run performance optimizer agent
-            optimizer = self.agents["performance_optimizer"]
-            results = await optimizer.analyze(
-                parsed_elements=state.parsed_elements,
-                project_id=state.project_id,
-                model=state.metadata.get("model"),
-                tone=state.metadata.get("tone")
-            )
-            
-            state.agent_outputs["performance_optimizer"] = results
-            state.progress["performance_optimizer"]["status"] = "completed"
-            
-            logger.info(f"Performance optimizer agent completed for session {state.session_id}")
-            return state
-            
-        except Exception as e:
-            logger.error(f"Performance optimizer agent failed: {e}")
-            state.errors.append(f"Performance optimizer agent failed: {str(e)}")
-            return state
+    async def _run_all_agents(self, state: AnalysisState) -> AnalysisState:
+        """Run every enabled agent concurrently over the parsed elements"""
+        enabled = self._enabled_agents(state)
+        logger.info("Running agents %s for session %s", list(enabled), state.session_id)
+        state.current_agent = "agents"
+        
+        async def run_agent(name: str, agent: Any) -> Any:
+            async with self._agent_sem:
+                state.progress[name] = {"status": "started"}
+                results = await agent.analyze(
+                    parsed_elements=state.parsed_elements,
+                    project_id=state.project_id,
+                    model=state.model,
+                    tone=state.tone,
+                    executor=self._cpu_pool
+                )
+            state.progress[name]["status"] = "completed"
+            self._mark_dirty(state.session_id)
+            await self._publish_status(state.session_id, "in_progress", state)
+            return results
+        
+        outputs = await asyncio.gather(
+            *[run_agent(name, agent) for name, agent in enabled.items()],
+            return_exceptions=True
+        )
+        
+        for name, output in zip(enabled, outputs):
+            if isinstance(output, Exception):
+                logger.error("Agent %s failed: %s", name, output)
+                state.errors.append(f"Agent {name} failed: {str(output)}")
+                state.progress[name] = {"status": "failed"}
+            else:
+                state.agent_outputs[name] = output
+                logger.info("Agent %s completed for session %s", name, state.session_id)
+        
+        return state
     
     async def _collect_results(self, state: AnalysisState) -> AnalysisState:
         """Collect and aggregate results from all agents"""
         try:
-            logger.info(f"Collecting results for session {state.session_id}")
+            logger.info("Collecting results for session %s", state.session_id)
             
             state.current_agent = "collector"
             state.progress["collection"] = {"status": "started"}
@@ -419,93 +603,162 @@ class AgentOrchestrator:
                 "project_id": state.project_id,
                 "timestamp": datetime.utcnow().isoformat(),
                 "agents_run": list(state.agent_outputs.keys()),
-                "results": state.agent_outputs,
-                "metadata": state.metadata,
+                # A copy, so the aggregate does not end up containing itself
+                "results": dict(state.agent_outputs),
+                "metadata": {
+                    "model": state.model,
+                    "tone": state.tone,
+                    "agents_config": state.agents_config,
+                    **state.metadata
+                },
                 "errors": state.errors
             }
             
             state.agent_outputs["aggregated"] = aggregated_results
             state.progress["collection"]["status"] = "completed"
+            self._mark_dirty(state.session_id)
+            await self._publish_status(state.session_id, "in_progress", state)
             
-            logger.info(f"Results collection completed for session {state.session_id}")
+            logger.info("Results collection completed for session %s", state.session_id)
             return state
             
         except Exception as e:
-            logger.error(f"Results collection failed: {e}")
+            logger.error("Results collection failed: %s", e)
             state.errors.append(f"Results collection failed: {str(e)}")
             return state
     
     async def _store_results(self, state: AnalysisState) -> AnalysisState:
         """Store analysis results in database"""
         try:
-            logger.info(f"Storing results for session {state.session_id}")
+            logger.info("Storing results for session %s", state.session_id)
             
             state.current_agent = "storer"
             state.progress["storage"] = {"status": "started"}
             
-            # Store agent outputs in database
-            for agent_type, output in state.agent_outputs.items():
-                if agent_type == "aggregated":
-                    continue
-                
-                await self.db_manager.store_agent_output(
-                    project_id=state.project_id,
-                    agent_type=agent_type,
-                    output_type=self._get_output_type(agent_type),
-                    content=output
-                )
+            # Store all agent outputs with a single batched insert
+            await self.db_manager.store_agent_outputs_bulk(
+                self._build_output_rows(state.project_id, state.agent_outputs)
+            )
             
+            await self._invalidate_cached_reads(state.session_id, state.project_id)
             state.progress["storage"]["status"] = "completed"
+            self._mark_dirty(state.session_id)
+            await self._publish_status(state.session_id, "in_progress", state)
             
-            logger.info(f"Results storage completed for session {state.session_id}")
+            logger.info("Results storage completed for session %s", state.session_id)
             return state
             
         except Exception as e:
-            logger.error(f"Results storage failed: {e}")
+            logger.error("Results storage failed: %s", e)
             state.errors.append(f"Results storage failed: {str(e)}")
             return state
     
+    def _build_output_rows(self, project_id: int, agent_outputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rows for agent_outputs, one per agent (the aggregate is not stored)"""
+        return [
+            {
+                "project_id": project_id,
+                "agent_type": agent_type,
+                "output_type": OUTPUT_TYPES.get(agent_type, "other"),
+                "content": json_dumps(output)
+            }
+            for agent_type, output in agent_outputs.items()
+            if agent_type != "aggregated"
+        ]
+    
     async def _handle_errors(self, state: AnalysisState) -> AnalysisState:
         """Handle errors that occurred during analysis"""
         try:
-            logger.info(f"Handling errors for session {state.session_id}")
+            logger.info("Handling errors for session %s", state.session_id)
             
             state.current_agent = "error_handler"
             state.progress["error_handling"] = {"status": "started"}
             
-            # Log errors and update session
-            if state.errors:
-                error_summary = "; ".join(state.errors)
-                await self.db_manager.update_session_status(
-                    state.session_id,
-                    "failed",
-                    error_message=error_summary
-                )
-            
+            # The failed status itself is written once by run_analysis
+            state.progress["error_handling"]["errors"] = len(state.errors)
             state.progress["error_handling"]["status"] = "completed"
+            self._mark_dirty(state.session_id)
+            await self._publish_status(state.session_id, "in_progress", state)
             
-            logger.info(f"Error handling completed for session {state.session_id}")
+            logger.info("Error handling completed for session %s", state.session_id)
             return state
             
         except Exception as e:
-            logger.error(f"Error handling failed: {e}")
+            logger.error("Error handling failed: %s", e)
             return state
     
-    def _should_continue(self, state: AnalysisState) -> str:
-        """Determine if workflow should continue or handle errors"""
-        if state.errors:
-            return "error"
-        return "continue"
+    async def _invalidate_cached_reads(self, session_id: str, project_id: Optional[int] = None):
+        """Drop cached API reads affected by a session or project write"""
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(STATUS_CACHE_KEY.format(session_id=session_id))
+            if project_id is not None:
+                pipe.delete(SUMMARY_CACHE_KEY.format(project_id=project_id))
+            await pipe.execute()
+    
+    def _mark_dirty(self, session_id: str):
+        """Queue a session snapshot for the next write-behind flush"""
+        self._dirty.add(session_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """Flush dirty session snapshots to Redis until none are left"""
+        while self._dirty:
+            await asyncio.sleep(SESSION_FLUSH_INTERVAL)
+            await self._flush_dirty_sessions()
     
-    def _get_output_type(self, agent_type: str) -> str:
-        """Map agent type to output type"""
+    async def _flush_dirty_sessions(self):
+        """Write all dirty, still-active sessions to Redis in one call"""
+        dirty, self._dirty = self._dirty, set()
         mapping = {
-            "documenter": "documentation",
-            "tester": "tests",
-            "security_auditor": "security_report",
-            "performance_optimizer": "performance_report"
+            f"session:{session_id}": self.active_sessions[session_id].to_dict()
+            for session_id in dirty
+            if session_id in self.active_sessions
+        }
+        if mapping:
+            await self.redis_client.mset(mapping, expire=RUNNING_SESSION_TTL)
+            # A session that finished while the write was in flight has already
+            # deleted its snapshot, so drop the one this flush just recreated
+            for key in mapping:
+                session_id = key[len("session:"):]
+                if session_id not in self.active_sessions:
+                    await self.redis_client.delete(key)
+    
+    async def _publish_status(
+        self,
+        session_id: str,
+        status: str,
+        state: Optional[AnalysisState] = None,
+        error: Optional[str] = None
+    ):
+        """Publish a status update to the session's live status stream"""
+        message = {
+            "session_id": session_id,
+            "status": status,
+            "current_agent": state.current_agent if state else None,
+            "progress": state.progress if state else {},
+            "errors": state.errors if state else [],
+            "error": error
         }
-        return mapping.get(agent_type, "other")
+        await self.redis_client.publish(SESSION_CHANNEL.format(session_id=session_id), message)
+    
+    def _enabled_agents(self, state: AnalysisState) -> Dict[str, Any]:
+        """Agents the session's agents_config leaves enabled (all by default)"""
+        return {
+            name: agent for name, agent in self.agents.items()
+            if state.agents_config.get(name, True)
+        }
+    
+    def _select_agents(self, state: AnalysisState) -> str:
+        """Choose whether the agent fan-out runs at all"""
+        if self._enabled_agents(state):
+            return "run"
+        logger.info("No agents enabled for session %s", state.session_id)
+        return "none"
+    
+    def _should_continue(self, state: AnalysisState) -> str:
+        """Determine if workflow should continue or handle errors"""
+        return "error" if state.fatal else "continue"
     
     def get_agents_status(self) -> Dict[str, Any]:
         """Get status of all agents"""
@@ -544,3 +797,34 @@ class AgentOrchestrator:
         
         # Check database
         return await self.db_manager.get_analysis_session(session_id)
+
+
+# Per-process orchestrator used when analyses run in a worker process pool
+_process_loop: Optional[asyncio.AbstractEventLoop] = None
+_process_orchestrator: Optional[AgentOrchestrator] = None
+
+def _get_process_orchestrator() -> Tuple[asyncio.AbstractEventLoop, AgentOrchestrator]:
+    """Lazily build this process's event loop and orchestrator"""
+    global _process_loop, _process_orchestrator
+    
+    if _process_orchestrator is None:
+        _process_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_process_loop)
+        db_manager = DatabaseManager()
+        redis_client = RedisClient(os.getenv("REDIS_URL", ""))
+        _process_loop.run_until_complete(asyncio.gather(db_manager.connect(), redis_client.connect()))
+        # This process is itself one of many workers, so a nested process pool
+        # would multiply process counts; CPU-bound steps run on threads instead
+        _process_orchestrator = AgentOrchestrator(db_manager, redis_client, cpu_pool=ThreadPoolExecutor())
+    
+    return _process_loop, _process_orchestrator
+
+def run_analysis_in_process(jobs: List[Dict[str, Any]]) -> List[Any]:
+    """
+    ProcessPoolExecutor entry point for a batch of analysis jobs
+    
+    The loop is kept alive between calls so the agents' shared HTTP
+    client stays bound to it.
+    """
+    loop, orchestrator = _get_process_orchestrator()
+    return loop.run_until_complete(orchestrator.run_analysis_batch(jobs))
@@ -0,0 +1,67 @@
+"""
+Shared fixtures for the AgentFlow Python agent tests
+Services run in-memory: RedisClient without a connection string and a recording database
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from agents import base_agent
+from orchestrator.graph import AgentOrchestrator
+from utils.redis_client import RedisClient
+
+
+class RecordingDatabase:
+    """In-memory stand-in for DatabaseManager that records session writes"""
+    
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.outputs: List[Dict[str, Any]] = []
+    
+    async def create_analysis_session(self, project_id: int, session_uuid: str, agents_config: Dict[str, Any]) -> bool:
+        self.sessions.setdefault(session_uuid, {"project_id": project_id, "status": "pending"})
+        return True
+    
+    async def update_session_status(self, session_id: str, status: str, error_message: Optional[str] = None) -> bool:
+        self.sessions.setdefault(session_id, {})
+        self.sessions[session_id].update(status=status, error_message=error_message)
+        return True
+    
+    async def store_agent_outputs_bulk(self, rows: List[Dict[str, Any]]) -> int:
+        self.outputs.extend(rows)
+        return len(rows)
+    
+    async def get_analysis_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self.sessions.get(session_id)
+
+
+@pytest.fixture(autouse=True)
+def character_token_estimate(monkeypatch):
+    """Use the character-count token estimate; tiktoken downloads its encodings on first use"""
+    monkeypatch.setattr(base_agent, "tiktoken", None)
+    base_agent._count_tokens.cache_clear()
+
+
+@pytest.fixture
+async def redis_client():
+    client = RedisClient()
+    await client.connect()
+    yield client
+    await client.disconnect()
+
+
+@pytest.fixture
+def db_manager():
+    return RecordingDatabase()
+
+
+@pytest.fixture
+async def orchestrator(db_manager, redis_client):
+    orchestrator = AgentOrchestrator(db_manager, redis_client)
+    yield orchestrator
+    if orchestrator._flush_task is not None:
+        orchestrator._flush_task.cancel()
+        await asyncio.gather(orchestrator._flush_task, return_exceptions=True)
+    await orchestrator.aclose()
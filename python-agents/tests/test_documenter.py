@@ -0,0 +1,53 @@
+"""
+Tests for the documenter agent
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agents.base_agent import AgentResult
+from agents.documenter import DocumenterAgent
+
+PARSED = {"a.php": {"content": "<?php class A { public function b() {} }"}}
+
+
+async def fake_call_llm(messages, context, on_chunk=None, model=None, tone=None):
+    """Answer like the LLM would, recording which model and tone were asked for"""
+    await asyncio.sleep(0.01)  # let concurrent sessions interleave
+    data = {"description": f"{model}/{tone}"}
+    if "elements" in context:
+        data = {"elements": [{"index": i, **data} for i in range(len(context["elements"]))]}
+    return AgentResult(success=True, data=data, metadata={})
+
+
+@pytest.fixture
+def documenter():
+    agent = DocumenterAgent()
+    agent._call_llm = fake_call_llm
+    return agent
+
+
+async def test_concurrent_sessions_keep_their_model_and_tone(documenter):
+    with ThreadPoolExecutor() as executor:
+        first, second = await asyncio.gather(
+            documenter.analyze(PARSED, 1, model="m1", tone="friendly", executor=executor),
+            documenter.analyze(PARSED, 1, model="m2", tone="strict", executor=executor)
+        )
+    
+    assert {element["description"] for element in first.data["elements"]} == {"m1/friendly"}
+    assert {element["description"] for element in second.data["elements"]} == {"m2/strict"}
+    assert (documenter.config.model, documenter.config.tone) == ("llama-3-70b", "professional")
+    
+    for key, llm_data in documenter._doc_cache.items():
+        assert llm_data["description"] in ("m1/friendly", "m2/strict")
+    assert len(documenter._doc_cache) == 4
+
+
+async def test_doc_cache_is_bounded(documenter):
+    documenter.doc_cache_size = 2
+    for key in ("a", "b", "c"):
+        documenter._cache_documentation(key, {"description": key})
+    
+    assert list(documenter._doc_cache) == ["b", "c"]
@@ -0,0 +1,161 @@
+"""
+Tests for the orchestrator's parse_code step
+"""
+
+import pytest
+
+from orchestrator.graph import AnalysisState
+
+PHP_SAMPLE = """<?php
+namespace App\\Models;
+
+// class Commented { function ignored() {} }
+class User extends Model
+{
+    public function posts()
+    {
+        return $this->hasMany(Post::class);
+    }
+
+    private static function table(): string
+    {
+        return "users { function fake() }";
+    }
+}
+
+function helper($value)
+{
+    return $value;
+}
+"""
+
+
+def make_state(files):
+    return AnalysisState(session_id="session-1", project_id=1, files=files)
+
+
+async def test_parses_php_sample(orchestrator):
+    state = await orchestrator._parse_code(make_state([{"path": "app/Models/User.php", "content": PHP_SAMPLE}]))
+    
+    elements = state.parsed_elements["app/Models/User.php"]
+    assert elements["classes"] == [{"name": "User"}]
+    assert elements["methods"] == [{"name": "posts"}, {"name": "table"}]
+    assert elements["functions"] == [{"name": "helper"}]
+    assert not state.fatal
+    assert state.errors == []
+
+
+async def test_parsed_elements_carry_content(orchestrator, redis_client):
+    file_data = {"path": "a.php", "content": PHP_SAMPLE}
+    state = await orchestrator._parse_code(make_state([file_data]))
+    
+    assert state.parsed_elements["a.php"]["content"] == PHP_SAMPLE
+    # Neither the parse cache nor the session snapshot holds file contents
+    cached = await redis_client.get(orchestrator._parsed_cache_key(file_data))
+    assert "content" not in cached
+    assert "content" not in state.to_dict()["parsed_elements"]["a.php"]
+
+
+async def test_reuses_cached_parse(orchestrator, redis_client):
+    files = [{"path": "a.php", "content": PHP_SAMPLE}]
+    await orchestrator._parse_code(make_state(files))
+    
+    def fail(content):
+        raise AssertionError("parsed again")
+    orchestrator.php_parser.parse_file = fail
+    
+    state = await orchestrator._parse_code(make_state([{"path": "b.php", "content": PHP_SAMPLE}]))
+    assert state.parsed_elements["b.php"]["classes"] == [{"name": "User"}]
+
+
+async def test_unsupported_files_are_not_fatal(orchestrator):
+    state = await orchestrator._parse_code(make_state([{"path": "README.md", "content": "# readme"}]))
+    
+    assert state.parsed_elements == {}
+    assert not state.fatal
+
+
+async def test_fatal_only_when_every_parse_fails(orchestrator):
+    def broken(content):
+        raise ValueError("bad input")
+    orchestrator.php_parser.parse_file = broken
+    
+    state = await orchestrator._parse_code(make_state([{"path": "a.php", "content": "<?php class A {}"}]))
+    
+    assert state.fatal
+    assert state.errors == ["Parse error in a.php: bad input"]
+
+
+TYPES_SAMPLE = """<?php
+trait T { public function a() {} }
+interface I { public function b(): void; }
+enum E: string { case X = 'x'; public function c() {} }
+function d() {}
+"""
+
+
+def test_lexer_reports_trait_interface_and_enum_methods():
+    from utils.php_parser import PHPParser
+    
+    elements = PHPParser()._parse_with_lexer(TYPES_SAMPLE)
+    
+    assert elements == {
+        "classes": [],
+        "methods": [{"name": "a"}, {"name": "b"}, {"name": "c"}],
+        "functions": [{"name": "d"}]
+    }
+
+
+# Sources where keyword-looking words must not open a class body
+PARITY_SAMPLES = [
+    PHP_SAMPLE,
+    TYPES_SAMPLE,
+    "<?php function f() { $class = 'x'; if ($y) { function g() {} } }",
+    "<?php function f() { $this->class = 1; if ($y) { function g() {} } }",
+    "<?php class A { function m() { $n = B::class; if ($x) { function g() {} } } }",
+    "<?php $x = new class(1) extends B implements C { public function m() {} }; function f() {}",
+    "<?php $x = new class { function m() {} }; function f() { return function () {}; }",
+]
+
+
+@pytest.mark.parametrize("source", PARITY_SAMPLES)
+def test_scanner_matches_lexer(monkeypatch, source):
+    """The byte scanner agrees with the regex lexer"""
+    import utils.php_parser as php_parser
+    from utils import php_scan
+    
+    monkeypatch.setattr(php_parser, "php_scan", php_scan)
+    parser = php_parser.PHPParser()
+    
+    assert parser._parse_with_scanner(source) == parser._parse_with_lexer(source)
+
+
+@pytest.mark.parametrize("source", PARITY_SAMPLES)
+def test_tree_sitter_matches_lexer(source):
+    """The preferred tree-sitter backend agrees with the regex lexer"""
+    from utils.php_parser import PHPParser
+    
+    parser = PHPParser()
+    if parser._tree_sitter_parser is None:
+        pytest.skip("tree-sitter-php is not installed")
+    
+    assert parser._parse_with_tree_sitter(source) == parser._parse_with_lexer(source)
+
+
+def test_keyword_named_variables_do_not_open_class_bodies():
+    from utils.php_parser import PHPParser
+    
+    elements = PHPParser()._parse_with_lexer(PARITY_SAMPLES[2])
+    
+    assert elements["functions"] == [{"name": "f"}, {"name": "g"}]
+    assert elements["methods"] == []
+
+
+async def test_staged_content_matches_inline(orchestrator, tmp_path):
+    content = "<?php\r\nclass A\r\n{\r\n}\r\n"
+    staged_path = tmp_path / "staged"
+    staged_path.write_bytes(content.encode("utf-8"))
+    
+    state = await orchestrator._parse_code(make_state([{"path": "a.php", "staged_path": str(staged_path)}]))
+    
+    assert state.parsed_elements["a.php"]["content"] == content
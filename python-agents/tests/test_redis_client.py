@@ -0,0 +1,87 @@
+"""
+Tests for RedisClient against a Redis server (fakeredis)
+"""
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from utils.redis_client import RedisClient
+
+
+def connect_to(server: "fakeredis.FakeServer") -> RedisClient:
+    """A client talking to a shared fake server, as separate processes would"""
+    client = RedisClient("redis://fake")
+    client._redis = fakeredis.aioredis.FakeRedis(server=server)
+    client._is_real_redis = True
+    return client
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+async def test_pubsub_crosses_clients(server):
+    publisher, subscriber = connect_to(server), connect_to(server)
+    
+    async with subscriber.subscribe("session_events:s1") as updates:
+        await asyncio.sleep(0.01)
+        receivers = await publisher.publish("session_events:s1", {"status": "completed"})
+        message = await asyncio.wait_for(updates.get(), timeout=1)
+    
+    assert receivers == 1
+    assert message == {"status": "completed"}
+    assert await publisher.publish("session_events:s1", {"status": "completed"}) == 0
+
+
+async def test_pubsub_in_memory(redis_client):
+    async with redis_client.subscribe("session_events:s1") as updates:
+        assert await redis_client.publish("session_events:s1", {"status": "failed"}) == 1
+        assert updates.get_nowait() == {"status": "failed"}
+    assert redis_client._subscribers == {}
+
+
+async def test_setb_values_read_back_through_get(server):
+    client = connect_to(server)
+    payload = b'JSON-looking {"not": json'
+    
+    await client.setb("rendered", payload)
+    
+    assert await client.getb("rendered") == payload
+    assert await client.get("rendered", use_l1=False) == payload
+
+
+@pytest.mark.parametrize("backend", ["memory", "server"])
+async def test_bytes_api_round_trips_with_tagged_values(backend, server, redis_client):
+    client = redis_client if backend == "memory" else connect_to(server)
+    
+    await client.setb("raw", b"\x00\xffJ")
+    await client.set("doc", {"status": "completed"})
+    await client.set("text", "héllo")
+    
+    assert await client.getb("raw") == b"\x00\xffJ"
+    assert await client.get("raw", use_l1=False) == b"\x00\xffJ"
+    assert await client.getb("doc") == b'{"status":"completed"}'
+    assert await client.getb("text") == "héllo".encode("utf-8")
+    assert await client.getb("missing") is None
+
+
+async def test_l1_is_opt_in_and_returns_copies(server):
+    reader, writer = connect_to(server), connect_to(server)
+    await writer.set("status:s1", {"status": "in_progress"})
+    await writer.set("parsed:v1:abc", {"classes": []})
+    
+    # Default reads always see other clients' writes
+    assert await reader.get("status:s1") == {"status": "in_progress"}
+    await writer.set("status:s1", {"status": "completed"})
+    assert await reader.get("status:s1") == {"status": "completed"}
+    
+    # Opted-in reads hit the cache, and mutating one result leaves the next intact
+    first = await reader.get("parsed:v1:abc", use_l1=True)
+    first["classes"].append({"name": "Mutated"})
+    [second] = await reader.mget(["parsed:v1:abc"], use_l1=True)
+    assert second == {"classes": []}
+    assert list(reader._l1) == ["parsed:v1:abc"]
@@ -0,0 +1,118 @@
+"""
+Tests for AgentOrchestrator.run_analysis
+"""
+
+import asyncio
+
+from test_documenter import fake_call_llm
+from utils.redis_client import PENDING_SESSION_KEY
+
+FILES = [{"path": "a.php", "content": "<?php class A { function b() {} }"}]
+
+# Agents are disabled so runs need no LLM
+NO_AGENTS = {"documenter": False}
+
+
+async def test_completes_without_agents(orchestrator, db_manager, redis_client):
+    await redis_client.set(PENDING_SESSION_KEY.format(session_id="s1"), {"status": "pending"})
+    
+    outputs = await orchestrator.run_analysis("s1", 1, [dict(file) for file in FILES], NO_AGENTS)
+    
+    assert db_manager.sessions["s1"]["status"] == "completed"
+    assert outputs["aggregated"]["session_id"] == "s1"
+    assert "aggregated" not in outputs["aggregated"]["results"]
+    assert await redis_client.get(PENDING_SESSION_KEY.format(session_id="s1")) is None
+
+
+async def test_cache_hit_describes_current_session(orchestrator, db_manager):
+    first = await orchestrator.run_analysis("s1", 1, [dict(file) for file in FILES], NO_AGENTS)
+    orchestrator.workflow = None  # a second workflow run would fail
+    second = await orchestrator.run_analysis("s2", 1, [dict(file) for file in FILES], NO_AGENTS)
+    
+    assert db_manager.sessions["s2"]["status"] == "completed"
+    assert second["aggregated"]["session_id"] == "s2"
+    assert first["aggregated"]["session_id"] == "s1"
+
+
+async def test_batched_sessions_keep_their_model_and_tone(orchestrator):
+    orchestrator.agents["documenter"]._call_llm = fake_call_llm
+    jobs = [
+        {"session_id": "s1", "project_id": 1, "files": [dict(file) for file in FILES], "model": "m1", "tone": "friendly"},
+        {"session_id": "s2", "project_id": 1, "files": [dict(file) for file in FILES], "model": "m2", "tone": "strict"}
+    ]
+    
+    first, second = await orchestrator.run_analysis_batch(jobs)
+    
+    assert first["documenter"].data["metadata"]["tone"] == "friendly"
+    assert {element["description"] for element in first["documenter"].data["elements"]} == {"m1/friendly"}
+    assert {element["description"] for element in second["documenter"].data["elements"]} == {"m2/strict"}
+
+
+def test_worker_process_orchestrator_uses_threads(monkeypatch):
+    """Worker processes must not start a nested process pool"""
+    from concurrent.futures import ThreadPoolExecutor
+    from orchestrator import graph
+    
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(graph, "_process_loop", None)
+    monkeypatch.setattr(graph, "_process_orchestrator", None)
+    
+    loop, orchestrator = graph._get_process_orchestrator()
+    try:
+        assert isinstance(orchestrator._cpu_pool, ThreadPoolExecutor)
+    finally:
+        loop.run_until_complete(orchestrator.aclose())
+        loop.run_until_complete(orchestrator.redis_client.disconnect())
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+async def test_failed_agent_results_are_not_cached(orchestrator, db_manager):
+    async def failing_call_llm(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+    orchestrator.agents["documenter"]._call_llm = failing_call_llm
+    
+    first = await orchestrator.run_analysis("s1", 1, [dict(file) for file in FILES])
+    assert first["documenter"].data["documented_elements"] == 0
+    
+    orchestrator.agents["documenter"]._call_llm = fake_call_llm
+    second = await orchestrator.run_analysis("s2", 1, [dict(file) for file in FILES])
+    
+    assert second["documenter"].data["documented_elements"] > 0
+
+
+async def test_running_session_reports_in_progress(orchestrator, redis_client):
+    pending_key = PENDING_SESSION_KEY.format(session_id="s1")
+    await redis_client.set(pending_key, {"status": "pending"})
+    seen = []
+    workflow = orchestrator.workflow
+    
+    class RecordingWorkflow:
+        async def ainvoke(self, state, config):
+            seen.append((await redis_client.get(pending_key))["status"])
+            return await workflow.ainvoke(state, config)
+    
+    orchestrator.workflow = RecordingWorkflow()
+    await orchestrator.run_analysis("s1", 1, [dict(file) for file in FILES], NO_AGENTS)
+    
+    assert seen == ["in_progress"]
+    assert await redis_client.get(pending_key) is None
+
+
+async def test_snapshot_flush_does_not_outlive_its_session(orchestrator, redis_client, monkeypatch):
+    from orchestrator.graph import AnalysisState
+    
+    orchestrator.active_sessions["s1"] = AnalysisState(session_id="s1", project_id=1, files=[])
+    orchestrator._dirty.add("s1")
+    mset = type(redis_client).mset
+    
+    async def finish_during_write(self, mapping, expire=None):
+        # run_analysis cleanup lands before the flush's write
+        del orchestrator.active_sessions["s1"]
+        await self.delete("session:s1")
+        return await mset(self, mapping, expire=expire)
+    
+    monkeypatch.setattr(type(redis_client), "mset", finish_during_write)
+    await orchestrator._flush_dirty_sessions()
+    
+    assert await redis_client.get("session:s1") is None
@@ -0,0 +1,233 @@
+"""
+Tests for the FastAPI routes, run against in-memory services without the lifespan workers
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from api import server
+
+
+@pytest.fixture
+async def api(db_manager, redis_client):
+    state = server.app.state
+    state.db_manager = db_manager
+    state.redis_client = redis_client
+    state.job_queue = asyncio.Queue(maxsize=server.JOB_QUEUE_SIZE)
+    transport = httpx.ASGITransport(app=server.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    for name in ("db_manager", "redis_client", "job_queue"):
+        delattr(state, name)
+
+
+async def test_backing_service_errors_reach_their_handler(api, db_manager):
+    redis_exceptions = pytest.importorskip("redis.exceptions")
+    
+    async def unavailable(session_id):
+        raise redis_exceptions.ConnectionError("connect to 10.0.0.5:6379 refused")
+    db_manager.get_analysis_session = unavailable
+    
+    response = await api.get("/status/s1")
+    
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Cache unavailable"}
+
+
+async def test_unexpected_errors_do_not_leak_details(api, db_manager):
+    async def broken(session_id):
+        raise RuntimeError("secret internal detail")
+    db_manager.get_analysis_session = broken
+    
+    response = await api.get("/status/s1")
+    
+    assert response.status_code == 500
+    assert "secret" not in response.text
+
+
+ANALYZE_BODY = {"project_id": 1, "files": [{"path": "a.php", "content": "<?php class A {}"}]}
+
+
+async def test_analyze_stages_pending_session(api, redis_client):
+    response = await api.post("/analyze", json=ANALYZE_BODY)
+    assert response.status_code == 202
+    session_id = response.json()["session_id"]
+    
+    status = await api.get(f"/status/{session_id}")
+    
+    assert status.status_code == 200
+    assert status.json()["status"] == "pending"
+    job = server.app.state.job_queue.get_nowait()
+    assert job["session_id"] == session_id
+
+
+async def test_full_queue_unstages_session(api, redis_client):
+    server.app.state.job_queue = asyncio.Queue(maxsize=1)
+    server.app.state.job_queue.put_nowait({})
+    
+    response = await api.post("/analyze", json=ANALYZE_BODY)
+    
+    assert response.status_code == 503
+    assert not [key for key in redis_client._storage if key.endswith(":pending")]
+
+
+async def test_celery_enqueue_runs_off_the_event_loop(api, monkeypatch):
+    import threading
+    
+    calls = []
+    
+    class FakeTask:
+        def apply_async(self, kwargs, task_id):
+            calls.append((task_id, threading.current_thread() is threading.main_thread()))
+    
+    monkeypatch.setattr(server, "ANALYSIS_BACKEND", "celery")
+    monkeypatch.setattr(server, "run_analysis_task", FakeTask(), raising=False)
+    
+    response = await api.post("/analyze", json=ANALYZE_BODY)
+    
+    assert response.status_code == 202
+    assert calls == [(response.json()["session_id"], False)]
+    assert server.app.state.job_queue.empty()
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.single = []
+        self.batches = []
+    
+    async def run_analysis(self, **job):
+        self.single.append(job["session_id"])
+        return {"status": "completed"}
+    
+    async def run_analysis_batch(self, jobs):
+        self.batches.append([job["session_id"] for job in jobs])
+        return [{"status": "completed"} for _ in jobs]
+
+
+async def test_collect_job_batch_gathers_jobs_within_the_window():
+    job_queue = asyncio.Queue()
+    for session_id in ("s1", "s2", "s3"):
+        job_queue.put_nowait({"session_id": session_id})
+    
+    jobs = await server.collect_job_batch(job_queue)
+    
+    assert [job["session_id"] for job in jobs] == ["s1", "s2", "s3"]
+
+
+async def test_analysis_worker_runs_queued_jobs(monkeypatch):
+    monkeypatch.setattr(server, "ANALYSIS_PROCESSES", 0)
+    monkeypatch.setattr(server.os, "cpu_count", lambda: 1)
+    orchestrator = FakeOrchestrator()
+    job_queue = asyncio.Queue()
+    
+    workers, pool = server.start_analysis_workers(job_queue, orchestrator)
+    try:
+        assert len(workers) == 1 and pool is None
+        job_queue.put_nowait({"session_id": "s1"})
+        await asyncio.wait_for(job_queue.join(), timeout=1)
+        job_queue.put_nowait({"session_id": "s2"})
+        job_queue.put_nowait({"session_id": "s3"})
+        await asyncio.wait_for(job_queue.join(), timeout=1)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    
+    assert orchestrator.single == ["s1"]
+    assert orchestrator.batches == [["s2", "s3"]]
+
+
+async def test_process_pool_requires_shared_redis(monkeypatch):
+    monkeypatch.setattr(server, "ANALYSIS_PROCESSES", 2)
+    monkeypatch.setattr(server, "REDIS_URL", "")
+    
+    workers, pool = server.start_analysis_workers(asyncio.Queue(), FakeOrchestrator())
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    
+    assert pool is None
+    assert len(workers) == 2
+
+
+def test_celery_backend_starts_no_local_workers(monkeypatch):
+    monkeypatch.setattr(server, "ANALYSIS_BACKEND", "celery")
+    monkeypatch.setattr(server, "ANALYSIS_PROCESSES", 4)
+    
+    workers, pool = server.start_analysis_workers(asyncio.Queue(), FakeOrchestrator())
+    
+    assert workers == [] and pool is None
+
+
+async def test_queue_backend_does_not_publish_to_celery(api, monkeypatch):
+    class FailingTask:
+        def apply_async(self, kwargs, task_id):
+            raise AssertionError("queue backend must not publish to Celery")
+    
+    monkeypatch.setattr(server, "run_analysis_task", FailingTask(), raising=False)
+    
+    response = await api.post("/analyze", json=ANALYZE_BODY)
+    
+    assert response.status_code == 202
+    job = server.app.state.job_queue.get_nowait()
+    assert job["session_id"] == response.json()["session_id"]
+
+
+async def test_upload_reports_skipped_files(api):
+    files = [
+        ("files", ("a.php", b"<?php class A {}")),
+        ("files", ("b.php", b"\xff\xfe not utf-8"))
+    ]
+    
+    response = await api.post("/upload-files", params={"project_id": 1}, files=files)
+    
+    assert response.status_code == 202
+    assert response.json()["files_uploaded"] == 1
+    assert response.json()["skipped_files"] == ["b.php"]
+
+
+async def test_upload_without_readable_files_is_rejected(api, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "UPLOAD_STAGING_DIR", str(tmp_path))
+    
+    response = await api.post("/upload-files", params={"project_id": 1}, files=[("files", ("b.php", b"\xff"))])
+    
+    assert response.status_code == 400
+    assert server.app.state.job_queue.empty()
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_upload_staging_is_removed_when_queue_is_full(api, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "UPLOAD_STAGING_DIR", str(tmp_path))
+    server.app.state.job_queue = asyncio.Queue(maxsize=1)
+    server.app.state.job_queue.put_nowait({})
+    
+    response = await api.post("/upload-files", params={"project_id": 1}, files=[("files", ("a.php", b"<?php"))])
+    
+    assert response.status_code == 503
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_batch_analyze_reports_accepted(api):
+    response = await api.post("/batch", json={"requests": [{"id": "1", "path": "/analyze", "body": ANALYZE_BODY}]})
+    
+    assert response.status_code == 200
+    assert response.json()["responses"][0]["status"] == 202
+
+
+async def test_batch_size_is_capped(api):
+    items = [{"id": str(i), "path": "/status/s1"} for i in range(server.BATCH_MAX_REQUESTS + 1)]
+    
+    response = await api.post("/batch", json={"requests": items})
+    
+    assert response.status_code == 422
+
+
+async def test_status_reports_running_session(api, db_manager, redis_client):
+    await db_manager.create_analysis_session(project_id=1, session_uuid="s1", agents_config={})
+    await redis_client.set(server.PENDING_SESSION_KEY.format(session_id="s1"), {"status": "in_progress"})
+    
+    response = await api.get("/status/s1")
+    
+    assert response.json()["status"] == "in_progress"
@@ -5,21 +5,27 @@ Basic implementation for database operations
 
 import logging
 from typing import Dict, List, Any, Optional
-import json
+
+from utils.json_utils import json_dumps
 
 
 class DatabaseManager:
     """Basic database manager for AgentFlow"""
     
-    def __init__(self, connection_string: str = ""):
+    def __init__(self, connection_string: str = "", pool_min: int = 5, pool_max: int = 20):
         self.connection_string = connection_string
+        self.pool_min = pool_min
+        self.pool_max = pool_max
         self.logger = logging.getLogger(__name__)
         self.logger.info("DatabaseManager initialized")
     
     async def connect(self) -> bool:
-        """Connect to database"""
+        """Connect to database with a pool of pool_min to pool_max connections"""
         # Basic implementation - just log connection attempt
-        self.logger.info(f"Attempting to connect to database: {self.connection_string}")
+        self.logger.info(
+            f"Attempting to connect to database: {self.connection_string} "
+            f"(pool {self.pool_min}-{self.pool_max})"
+        )
         return True
     
     async def disconnect(self) -> bool:
@@ -35,13 +41,13 @@ class DatabaseManager:
     
     def insert_record(self, table: str, data: Dict[str, Any]) -> int:
         """Insert a record into the specified table"""
-        self.logger.info(f"Inserting into {table}: {json.dumps(data, indent=2)}")
+        self.logger.info(f"Inserting into {table}: {json_dumps(data, indent=True)}")
         # Basic implementation - return fake ID
         return 1
     
     def update_record(self, table: str, record_id: int, data: Dict[str, Any]) -> bool:
         """Update a record in the specified table"""
-        self.logger.info(f"Updating {table} ID {record_id}: {json.dumps(data, indent=2)}")
+        self.logger.info(f"Updating {table} ID {record_id}: {json_dumps(data, indent=True)}")
         # Basic implementation - return success
         return True
     
@@ -67,6 +73,21 @@ class DatabaseManager:
         self.logger.info(f"Creating analysis session {session_uuid} for project {project_id}")
         return True
     
+    async def store_agent_outputs_bulk(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert agent outputs with one multi-row statement in a single transaction"""
+        if not rows:
+            return 0
+        
+        columns = list(rows[0].keys())
+        row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        query = (
+            f"INSERT INTO agent_outputs ({', '.join(columns)}) "
+            f"VALUES {', '.join([row_placeholder] * len(rows))}"
+        )
+        # Basic implementation - just log the statement
+        self.execute_query(query)
+        return len(rows)
+    
     async def close(self) -> bool:
         """Close database connection"""
         self.logger.info("Closing database connection")
@@ -0,0 +1,44 @@
+"""
+JSON utility for AgentFlow
+Uses orjson when available and falls back to the standard library
+"""
+
+import dataclasses
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Fallback encoder: dataclass instances as dicts, anything else as a string"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Deserialize a JSON document"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_bytes(value: Any, sort_keys: bool = False) -> bytes:
+    """Serialize a value to UTF-8 JSON bytes, skipping the str round trip"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS if sort_keys else 0, default=_default)
+    return json.dumps(value, sort_keys=sort_keys, default=_default).encode("utf-8")
+
+
+def json_dumps(value: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize a value to a JSON string"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(value, option=option, default=_default).decode("utf-8")
+    return json.dumps(value, indent=2 if indent else None, sort_keys=sort_keys, default=_default)
@@ -4,36 +4,149 @@ Basic implementation for parsing PHP code
 """
 
 import re
-from typing import Dict, List, Any
+import sys
+from typing import Dict, List, Any, Optional
+
+try:
+    import tree_sitter_php
+    from tree_sitter import Language, Parser
+except ImportError:
+    tree_sitter_php = None
+
+try:
+    import numpy as np
+    from utils import php_scan
+    if not php_scan.NUMBA_AVAILABLE:
+        php_scan = None
+except ImportError:
+    php_scan = None
+
+
+# Single-pass lexer: comments and strings are consumed so braces and keywords
+# inside them are ignored; braces are tracked to tell methods from functions
+TOKEN_PATTERN = re.compile(r"""
+      (?P<comment>//[^\n]*|\#(?!\[)[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<open>\{)
+    | (?P<close>\})
+    | (?P<anonymous_class>\bnew\s+class\b)
+    | (?<!::)(?<!\$)(?<!->)\bclass\s+(?!extends\b|implements\b)(?P<class>\w+)
+    | (?<!::)(?<!\$)(?<!->)\b(?:trait|interface|enum)\s+(?P<type>\w+)
+    | \bfunction\s+&?\s*(?P<function>\w+)\s*\(
+""", re.VERBOSE | re.DOTALL)
+
+
+def _build_tree_sitter_parser() -> Optional["Parser"]:
+    """Build the tree-sitter PHP parser once, if the bindings are installed"""
+    if tree_sitter_php is None:
+        return None
+    try:
+        return Parser(Language(tree_sitter_php.language_php()))
+    except Exception:
+        return None
 
 
 class PHPParser:
-    """Basic PHP code parser using regex patterns"""
+    """
+    Basic PHP code parser using tree-sitter or a compiled scanner when available, else a single-pass lexer
+    
+    Element names are interned: the same class and method names recur across
+    many files, so parsed elements share one string per name.
+    """
     
-    def __init__(self):
-        self.class_pattern = re.compile(r'class\s+(\w+)')
-        self.function_pattern = re.compile(r'function\s+(\w+)\s*\(')
-        self.method_pattern = re.compile(r'(?:public|private|protected)?\s*function\s+(\w+)\s*\(')
+    _tree_sitter_parser = _build_tree_sitter_parser()
     
     def parse_file(self, content: str) -> Dict[str, Any]:
         """Parse PHP file content and extract basic elements"""
+        if self._tree_sitter_parser is not None:
+            return self._parse_with_tree_sitter(content)
+        if php_scan is not None:
+            return self._parse_with_scanner(content)
+        return self._parse_with_lexer(content)
+    
+    def _parse_with_scanner(self, content: str) -> Dict[str, Any]:
+        """Extract classes, top-level functions and methods with the Numba byte scanner"""
         result = {
             'classes': [],
             'functions': [],
             'methods': []
         }
+        buckets = {
+            php_scan.KIND_CLASS: result['classes'],
+            php_scan.KIND_METHOD: result['methods'],
+            php_scan.KIND_FUNCTION: result['functions']
+        }
         
-        # Extract classes
-        classes = self.class_pattern.findall(content)
-        result['classes'] = [{'name': name} for name in classes]
+        data = content.encode('utf-8')
+        kinds, name_starts, name_ends, count = php_scan.scan(np.frombuffer(data, dtype=np.uint8))
+        for kind, start, end in zip(kinds[:count].tolist(), name_starts[:count].tolist(), name_ends[:count].tolist()):
+            buckets[kind].append({'name': sys.intern(data[start:end].decode('utf-8'))})
         
-        # Extract functions (outside classes)
-        functions = self.function_pattern.findall(content)
-        result['functions'] = [{'name': name} for name in functions]
+        return result
+    
+    def _parse_with_lexer(self, content: str) -> Dict[str, Any]:
+        """Extract classes, top-level functions and methods in one scan"""
+        result = {
+            'classes': [],
+            'functions': [],
+            'methods': []
+        }
+        
+        depth = 0
+        class_depths: List[int] = []  # brace depth of each open class body
+        pending_class = False
+        
+        for match in TOKEN_PATTERN.finditer(content):
+            kind = match.lastgroup
+            
+            if kind == 'open':
+                depth += 1
+                if pending_class:
+                    class_depths.append(depth)
+                    pending_class = False
+            elif kind == 'close':
+                if class_depths and class_depths[-1] == depth:
+                    class_depths.pop()
+                depth -= 1
+            elif kind == 'class':
+                result['classes'].append({'name': sys.intern(match.group('class'))})
+                pending_class = True
+            elif kind in ('anonymous_class', 'type'):
+                # Traits, interfaces and enums hold methods but are not reported as classes
+                pending_class = True
+            elif kind == 'function':
+                # Methods sit directly in a class body; anything else is a function
+                name = sys.intern(match.group('function'))
+                if class_depths and class_depths[-1] == depth:
+                    result['methods'].append({'name': name})
+                else:
+                    result['functions'].append({'name': name})
+        
+        return result
+    
+    def _parse_with_tree_sitter(self, content: str) -> Dict[str, Any]:
+        """Extract classes, functions and methods from a tree-sitter syntax tree"""
+        result = {
+            'classes': [],
+            'functions': [],
+            'methods': []
+        }
+        buckets = {
+            'class_declaration': result['classes'],
+            'function_definition': result['functions'],
+            'method_declaration': result['methods']
+        }
         
-        # Extract methods (inside classes)
-        methods = self.method_pattern.findall(content)
-        result['methods'] = [{'name': name} for name in methods]
+        tree = self._tree_sitter_parser.parse(content.encode('utf-8'))
+        stack = [tree.root_node]
+        while stack:
+            node = stack.pop()
+            bucket = buckets.get(node.type)
+            if bucket is not None:
+                name = node.child_by_field_name('name')
+                if name is not None:
+                    bucket.append({'name': sys.intern(name.text.decode('utf-8'))})
+            stack.extend(reversed(node.children))
         
         return result
     
@@ -0,0 +1,215 @@
+"""
+PHP declaration scanner for AgentFlow
+Byte-level brace/string/comment state machine, JIT-compiled with Numba when available
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Fallback decorator that leaves the function as plain Python"""
+        def decorator(func):
+            return func
+        return decorator
+
+
+# Declaration kinds emitted by scan()
+KIND_CLASS = 0
+KIND_METHOD = 1
+KIND_FUNCTION = 2
+
+_CLASS = np.frombuffer(b"class", dtype=np.uint8)
+_FUNCTION = np.frombuffer(b"function", dtype=np.uint8)
+_NEW = np.frombuffer(b"new", dtype=np.uint8)
+_EXTENDS = np.frombuffer(b"extends", dtype=np.uint8)
+_IMPLEMENTS = np.frombuffer(b"implements", dtype=np.uint8)
+_TRAIT = np.frombuffer(b"trait", dtype=np.uint8)
+_INTERFACE = np.frombuffer(b"interface", dtype=np.uint8)
+_ENUM = np.frombuffer(b"enum", dtype=np.uint8)
+
+
+@njit(cache=True)
+def _is_word_byte(c):
+    return (
+        (c >= 97 and c <= 122)      # a-z
+        or (c >= 65 and c <= 90)    # A-Z
+        or (c >= 48 and c <= 57)    # 0-9
+        or c == 95                  # _
+        or c >= 128                 # multi-byte identifiers
+    )
+
+
+@njit(cache=True)
+def _is_space(c):
+    return c == 32 or c == 9 or c == 10 or c == 13
+
+
+@njit(cache=True)
+def _word_equals(buf, start, end, word):
+    if end - start != word.shape[0]:
+        return False
+    for k in range(word.shape[0]):
+        if buf[start + k] != word[k]:
+            return False
+    return True
+
+
+@njit(cache=True)
+def _skip_space(buf, i, n):
+    while i < n and _is_space(buf[i]):
+        i += 1
+    return i
+
+
+@njit(cache=True)
+def _word_end(buf, i, n):
+    while i < n and _is_word_byte(buf[i]):
+        i += 1
+    return i
+
+
+@njit(cache=True, boundscheck=False)
+def scan(buf):
+    """
+    Scan PHP source bytes for class, method and function declarations
+
+    Returns (kinds, name_starts, name_ends, count); only the first count
+    entries of each array are filled.
+    """
+    n = buf.shape[0]
+    capacity = n // 8 + 1
+    kinds = np.empty(capacity, dtype=np.int32)
+    name_starts = np.empty(capacity, dtype=np.int32)
+    name_ends = np.empty(capacity, dtype=np.int32)
+    class_depths = np.empty(n // 2 + 1, dtype=np.int32)  # brace depth of each open class body
+
+    count = 0
+    open_classes = 0
+    depth = 0
+    pending_class = False
+    after_new = False
+    after_double_colon = False
+
+    i = 0
+    while i < n:
+        c = buf[i]
+        nxt = buf[i + 1] if i + 1 < n else 0
+
+        # Line comments (// and #, but not #[ attributes)
+        if (c == 47 and nxt == 47) or (c == 35 and nxt != 91):
+            while i < n and buf[i] != 10:
+                i += 1
+            continue
+
+        # Block comments
+        if c == 47 and nxt == 42:
+            i += 2
+            while i + 1 < n and not (buf[i] == 42 and buf[i + 1] == 47):
+                i += 1
+            i += 2
+            continue
+
+        # Quoted strings
+        if c == 39 or c == 34:
+            i += 1
+            while i < n and buf[i] != c:
+                if buf[i] == 92:
+                    i += 1
+                i += 1
+            i += 1
+            after_new = False
+            after_double_colon = False
+            continue
+
+        if c == 123:  # {
+            depth += 1
+            if pending_class:
+                class_depths[open_classes] = depth
+                open_classes += 1
+                pending_class = False
+            i += 1
+        elif c == 125:  # }
+            if open_classes > 0 and class_depths[open_classes - 1] == depth:
+                open_classes -= 1
+            depth -= 1
+            i += 1
+        elif _is_word_byte(c) and (i == 0 or not _is_word_byte(buf[i - 1])):
+            end = _word_end(buf, i, n)
+
+            # Variables and properties named like keywords ($class, ->class) declare nothing
+            keyword = not after_double_colon and not (
+                i > 0 and (buf[i - 1] == 36 or (buf[i - 1] == 62 and i > 1 and buf[i - 2] == 45))
+            )
+
+            if keyword and _word_equals(buf, i, end, _CLASS):
+                if after_new:
+                    pending_class = True
+                else:
+                    name_start = _skip_space(buf, end, n)
+                    name_end = _word_end(buf, name_start, n)
+                    if (
+                        name_end > name_start
+                        and not _word_equals(buf, name_start, name_end, _EXTENDS)
+                        and not _word_equals(buf, name_start, name_end, _IMPLEMENTS)
+                    ):
+                        kinds[count] = KIND_CLASS
+                        name_starts[count] = name_start
+                        name_ends[count] = name_end
+                        count += 1
+                        end = name_end
+                        pending_class = True
+
+            elif keyword and (
+                _word_equals(buf, i, end, _TRAIT)
+                or _word_equals(buf, i, end, _INTERFACE)
+                or _word_equals(buf, i, end, _ENUM)
+            ):
+                # Traits, interfaces and enums hold methods but are not reported as classes
+                name_start = _skip_space(buf, end, n)
+                name_end = _word_end(buf, name_start, n)
+                if name_end > name_start:
+                    end = name_end
+                    pending_class = True
+
+            elif _word_equals(buf, i, end, _FUNCTION):
+                name_start = _skip_space(buf, end, n)
+                if name_start < n and buf[name_start] == 38:  # &
+                    name_start = _skip_space(buf, name_start + 1, n)
+                name_end = _word_end(buf, name_start, n)
+                paren = _skip_space(buf, name_end, n)
+
+                # Named declarations only; closures have no name
+                if name_end > name_start and paren < n and buf[paren] == 40:
+                    if open_classes > 0 and class_depths[open_classes - 1] == depth:
+                        kinds[count] = KIND_METHOD
+                    else:
+                        kinds[count] = KIND_FUNCTION
+                    name_starts[count] = name_start
+                    name_ends[count] = name_end
+                    count += 1
+                    end = name_end
+
+            after_new = _word_equals(buf, i, end, _NEW)
+            after_double_colon = False
+            i = end
+            continue
+        else:
+            i += 1
+
+        if not _is_space(c):
+            after_new = False
+            after_double_colon = c == 58 and nxt == 58
+            if after_double_colon:
+                i += 1
+
+    return kinds, name_starts, name_ends, count
+
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from cache) at import rather than on the first request
+    scan(np.zeros(1, dtype=np.uint8))
@@ -3,87 +3,784 @@ Redis Client utility for AgentFlow
 Basic implementation for Redis operations
 """
 
+import asyncio
+import dataclasses
+import heapq
+import itertools
 import logging
-from typing import Any, Optional, Dict
-import json
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Dict, List, Set, Tuple, Union
+
+from utils.json_utils import json_dumps_bytes, json_loads
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+# Cache keys for API read endpoints, invalidated by the orchestrator on writes
+STATUS_CACHE_KEY = "status:{session_id}"
+SUMMARY_CACHE_KEY = "summary:{project_id}"
+
+# Pub/sub channel carrying progress updates for an analysis session
+SESSION_CHANNEL = "session_events:{session_id}"
+
+# Cached results of /agents/{agent_type}/test, keyed by normalized payload digest
+AGENT_TEST_CACHE_KEY = "agent_test:{agent_type}:{digest}"
+
+# Agent outputs of a finished analysis, keyed by a fingerprint of its inputs
+ANALYSIS_CACHE_KEY = "analysis:v1:{fingerprint}"
+
+# Parser output for a file, keyed by a digest of its type and content
+PARSED_CACHE_KEY = "parsed:v1:{digest}"
+
+# Sessions accepted by the API but not yet persisted by the orchestrator
+PENDING_SESSION_KEY = "session:{session_id}:pending"
+
+# Longest the in-memory expiry sweeper sleeps between checks, in seconds
+EXPIRY_SWEEP_INTERVAL = 1.0
+
+# set_large writes this many hash fields per round trip
+LARGE_VALUE_CHUNK = 256
+
+# Hash field recording whether a large value was a dict or a list
+LARGE_VALUE_KIND_FIELD = "__agentflow_kind__"
+
+# Longest str/bytes value (in UTF-8 bytes) the in-memory backend packs into its arena
+ARENA_MAX_VALUE = 256
+
+# Arena size below which dead bytes are never compacted away
+ARENA_COMPACT_MIN = 64 * 1024
+
+# Debug records buffered between flushes; the oldest are dropped when full
+LOG_BUFFER_SIZE = 65536
+
+# How often the log flusher thread hands buffered records to the logger, in seconds
+LOG_FLUSH_INTERVAL = 0.1
+
+
+# Marker for a key absent from the client-side cache (None is a valid value)
+_MISS = object()
+
+# One-byte tags prefixed to values on the wire so get() can decode
+# them with a branch instead of trying JSON and catching the failure
+TAG_JSON = 0x4A   # b"J": JSON document
+TAG_STR = 0x53    # b"S": UTF-8 text
+TAG_BYTES = 0x42  # b"B": raw bytes
+
+# Length prefix of each value packed into the in-memory arena
+_ARENA_HEADER = struct.Struct("<I")
+
+def _encode_json(value: Any) -> bytes:
+    """Tagged JSON document"""
+    return b"J" + json_dumps_bytes(value)
+
+def _encode_str(value: str) -> bytes:
+    """Tagged UTF-8 text"""
+    return b"S" + value.encode("utf-8")
+
+def _encode_bytes(value: bytes) -> bytes:
+    """Tagged raw bytes"""
+    return b"B" + value
+
+# Wire encoder for each exact value type; other types are stored as str()
+WIRE_ENCODERS = {
+    dict: _encode_json,
+    list: _encode_json,
+    tuple: _encode_json,
+    int: _encode_json,
+    float: _encode_json,
+    bool: _encode_json,
+    type(None): _encode_json,
+    str: _encode_str,
+    bytes: _encode_bytes
+}
+
+
+class RedisPipeline:
+    """Buffered commands sent to Redis in one round trip, optionally as a MULTI/EXEC transaction"""
+    
+    def __init__(self, client: "RedisClient", transaction: bool = True):
+        self._client = client
+        self.transaction = transaction
+        self._commands: List[tuple] = []
+    
+    def __enter__(self) -> "RedisPipeline":
+        return self
+    
+    def __exit__(self, *exc_info):
+        # Like redis-py, leaving the block discards anything not executed
+        self._commands.clear()
+    
+    def set(self, key: str, value: Any, expire: Optional[int] = None) -> "RedisPipeline":
+        """Queue a set"""
+        self._commands.append(("set", key, value, expire))
+        return self
+    
+    def delete(self, key: str) -> "RedisPipeline":
+        """Queue a delete"""
+        self._commands.append(("delete", key))
+        return self
+    
+    async def execute(self) -> List[Any]:
+        """Run the queued commands in one round trip, returning their results in order"""
+        commands, self._commands = self._commands, []
+        client = self._client
+        
+        if client._redis is None:
+            return [await getattr(client, name)(*args) for name, *args in commands]
+        
+        async with client._redis.pipeline(transaction=self.transaction) as pipe:
+            for name, key, *args in commands:
+                client._l1.pop(key, None)
+                if name == "set":
+                    value, expire = args
+                    client._wire_set(pipe, key, client._encode(value), expire)
+                else:
+                    client._wire_delete(pipe, key)
+            return await pipe.execute()
 
 
 class RedisClient:
     """Basic Redis client for AgentFlow"""
     
-    def __init__(self, connection_string: str = ""):
+    __slots__ = (
+        "connection_string", "max_connections", "logger",
+        "_pool", "_redis", "_is_real_redis",
+        "_storage", "_expiry", "_sweeper", "_subscribers",
+        "l1_capacity", "l1_ttl", "_l1", "_hash_prefixes", "_hashes",
+        "_arena", "_arena_dead",
+        "_logq", "_log_stop", "_log_flusher"
+    )
+    
+    def __init__(
+        self,
+        connection_string: str = "",
+        max_connections: int = 50,
+        l1_capacity: int = 4096,
+        l1_ttl: float = 1.0
+    ):
         self.connection_string = connection_string
+        self.max_connections = max_connections
+        # Client-side LRU of wire bytes in front of a real server, used only
+        # by reads that opt in with use_l1=True. Local writes invalidate it;
+        # writes from other processes show up after at most l1_ttl seconds.
+        # l1_capacity=0 disables it.
+        self.l1_capacity = l1_capacity
+        self.l1_ttl = l1_ttl
+        self._l1: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()
+        # Bounded pool shared by all coroutines, created by connect()
+        self._pool: Optional["aioredis.ConnectionPool"] = None
+        self._redis: Optional["aioredis.Redis"] = None
+        # Only a real server needs values serialized for the wire
+        self._is_real_redis = False
         self.logger = logging.getLogger(__name__)
         self.logger.info("RedisClient initialized")
-        # Basic in-memory storage for development
-        self._storage: Dict[str, Any] = {}
+        # Per-operation debug records as (time_ns, fmt, args), handed to the
+        # logger by a background thread so hot paths skip the logging lock
+        self._logq: "deque[Tuple[int, str, Tuple[Any, ...]]]" = deque(maxlen=LOG_BUFFER_SIZE)
+        self._log_stop = threading.Event()
+        self._log_flusher: Optional[threading.Thread] = None
+        # Basic in-memory storage for development, used without a connection string:
+        # key -> (value, monotonic deadline in ns or None), or for short
+        # str/bytes values (arena offset, deadline, TAG_STR or TAG_BYTES)
+        self._storage: Dict[str, Tuple[Any, ...]] = {}
+        # Short str/bytes values packed back to back as length-prefixed
+        # bytes, sparing a Python object per entry; _arena_dead counts
+        # bytes of overwritten or deleted values awaiting compaction
+        self._arena = bytearray()
+        self._arena_dead = 0
+        # Min-heap of (deadline, key); entries go stale when a key is rewritten
+        self._expiry: List[Tuple[int, str]] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        # Key prefixes packed into one hash each (see register_hash_prefix),
+        # and their in-memory contents: hash name -> field -> value
+        self._hash_prefixes: Set[str] = set()
+        self._hashes: Dict[str, Dict[str, Any]] = {}
+        # Subscriber queues per pub/sub channel
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
     
     async def connect(self) -> bool:
-        """Connect to Redis"""
-        self.logger.info(f"Attempting to connect to Redis: {self.connection_string}")
+        """Connect to Redis, opening a pool of up to max_connections connections"""
+        self._start_log_flusher()
+        if not self.connection_string or aioredis is None:
+            self.logger.info("No Redis server configured, using in-memory storage")
+            if self._sweeper is None or self._sweeper.done():
+                self._sweeper = asyncio.create_task(self._sweep_expired())
+            return True
+        
+        self.logger.info(
+            f"Attempting to connect to Redis: {self.connection_string} "
+            f"(max connections {self.max_connections})"
+        )
+        self._pool = aioredis.ConnectionPool.from_url(
+            self.connection_string,
+            max_connections=self.max_connections
+        )
+        self._redis = aioredis.Redis(connection_pool=self._pool)
+        self._is_real_redis = True
         return True
     
     async def disconnect(self) -> bool:
         """Disconnect from Redis"""
+        if self._log_flusher is not None:
+            self._log_stop.set()
+            self._log_flusher.join()
+            self._log_flusher = None
         self.logger.info("Disconnecting from Redis")
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            await self._pool.disconnect()
+            self._redis = None
+            self._pool = None
+            self._is_real_redis = False
         return True
     
-    def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
-        """Set a key-value pair"""
-        self.logger.info(f"Setting key {key} with expire {expire}")
+    def _debug(self, fmt: str, *args: Any):
+        """Queue a debug record for the flusher thread"""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._logq.append((time.time_ns(), fmt, args))
+    
+    def _start_log_flusher(self):
+        """Start the thread that drains queued debug records, unless it is running"""
+        if self._log_flusher is not None and self._log_flusher.is_alive():
+            return
+        self._log_stop.clear()
+        self._log_flusher = threading.Thread(
+            target=self._flush_logs, name="redis-client-log", daemon=True
+        )
+        self._log_flusher.start()
+    
+    def _flush_logs(self):
+        """Drain queued debug records every LOG_FLUSH_INTERVAL until stopped"""
+        while not self._log_stop.wait(LOG_FLUSH_INTERVAL):
+            self._drain_logs()
+        self._drain_logs()
+    
+    def _drain_logs(self):
+        """Emit queued debug records through the logger, keeping their original timestamps"""
+        logq = self._logq
+        while logq:
+            created_ns, fmt, args = logq.popleft()
+            record = self.logger.makeRecord(
+                self.logger.name, logging.DEBUG, __file__, 0, fmt, args, None
+            )
+            record.created = created_ns / 1e9
+            record.msecs = (created_ns // 1_000_000) % 1000
+            self.logger.handle(record)
+    
+    def register_hash_prefix(self, prefix: str):
+        """
+        Store keys of the form "<prefix>:<field>" as fields of one hash named prefix
+        
+        Packing many small keys into a hash saves Redis' per-key overhead.
+        Hash fields have no expiry of their own, so only register prefixes
+        whose keys do not rely on expire.
+        """
+        self._hash_prefixes.add(prefix)
+    
+    def _route(self, key: str) -> Optional[Tuple[str, str]]:
+        """(hash name, field) for a key under a registered prefix, else None"""
+        if not self._hash_prefixes:
+            return None
+        prefix, _, field = key.rpartition(":")
+        if prefix in self._hash_prefixes:
+            return prefix, field
+        return None
+    
+    def _wire_set(self, target: Any, key: str, payload: Any, expire: Optional[int] = None) -> Any:
+        """Issue SET (or HSET for packed keys) on a client or pipeline"""
+        route = self._route(key)
+        if route is not None:
+            return target.hset(route[0], route[1], payload)
+        return target.set(key, payload, ex=expire)
+    
+    def _wire_get(self, target: Any, key: str) -> Any:
+        """Issue GET (or HGET for packed keys) on a client or pipeline"""
+        route = self._route(key)
+        if route is not None:
+            return target.hget(*route)
+        return target.get(key)
+    
+    def _wire_delete(self, target: Any, key: str) -> Any:
+        """Issue DEL (or HDEL for packed keys) on a client or pipeline"""
+        route = self._route(key)
+        if route is not None:
+            return target.hdel(*route)
+        return target.delete(key)
+    
+    def _store(self, key: str, value: Any, expire: Optional[int] = None):
+        """Write an in-memory entry, scheduling its expiry"""
+        route = self._route(key)
+        if route is not None:
+            self._hashes.setdefault(route[0], {})[route[1]] = value
+            return
+        deadline = None
+        if expire:
+            deadline = time.monotonic_ns() + expire * 1_000_000_000
+            heapq.heappush(self._expiry, (deadline, key))
+        self._release(self._storage.get(key))
+        entry = self._arena_pack(value, deadline)
+        self._storage[key] = entry if entry is not None else (value, deadline)
+    
+    def _load(self, key: str) -> Optional[Any]:
+        """Read an in-memory entry, dropping it if it has expired"""
+        route = self._route(key)
+        if route is not None:
+            return self._hashes.get(route[0], {}).get(route[1])
+        entry = self._storage.get(key)
+        if entry is None:
+            return None
+        deadline = entry[1]
+        if deadline is not None and time.monotonic_ns() >= deadline:
+            self._evict(key)
+            return None
+        if len(entry) == 3:
+            return self._arena_unpack(entry)
+        return entry[0]
+    
+    def _evict(self, key: str):
+        """Remove an in-memory entry, releasing its arena bytes"""
+        self._release(self._storage.pop(key, None))
+    
+    def _arena_pack(self, value: Any, deadline: Optional[int]) -> Optional[Tuple[int, Optional[int], int]]:
+        """Append a short str or bytes value to the arena, returning its storage entry"""
+        if type(value) is str:
+            data, tag = value.encode(), TAG_STR
+        elif type(value) is bytes:
+            data, tag = value, TAG_BYTES
+        else:
+            return None
+        if len(data) > ARENA_MAX_VALUE:
+            return None
+        offset = len(self._arena)
+        self._arena += _ARENA_HEADER.pack(len(data))
+        self._arena += data
+        return (offset, deadline, tag)
+    
+    def _arena_unpack(self, entry: Tuple[int, Optional[int], int]) -> Union[str, bytes]:
+        """Read a value back out of the arena"""
+        offset, _, tag = entry
+        (length,) = _ARENA_HEADER.unpack_from(self._arena, offset)
+        start = offset + _ARENA_HEADER.size
+        data = bytes(self._arena[start:start + length])
+        return data.decode() if tag == TAG_STR else data
+    
+    def _release(self, entry: Optional[Tuple[Any, ...]]):
+        """Mark an arena entry's bytes dead, compacting once they outweigh live data 2:1"""
+        if entry is None or len(entry) != 3:
+            return
+        (length,) = _ARENA_HEADER.unpack_from(self._arena, entry[0])
+        self._arena_dead += _ARENA_HEADER.size + length
+        live = len(self._arena) - self._arena_dead
+        if len(self._arena) >= ARENA_COMPACT_MIN and self._arena_dead > 2 * live:
+            self._compact_arena(skip=entry[0])
+    
+    def _compact_arena(self, skip: int):
+        """Copy live arena values into a fresh buffer and rewrite their offsets"""
+        arena = bytearray()
+        header_size = _ARENA_HEADER.size
+        for key, entry in self._storage.items():
+            if len(entry) != 3 or entry[0] == skip:
+                continue
+            offset = entry[0]
+            (length,) = _ARENA_HEADER.unpack_from(self._arena, offset)
+            self._storage[key] = (len(arena), entry[1], entry[2])
+            arena += self._arena[offset:offset + header_size + length]
+        self._arena = arena
+        self._arena_dead = 0
+    
+    async def _sweep_expired(self):
+        """Evict expired in-memory entries so unread keys do not accumulate"""
+        while True:
+            now = time.monotonic_ns()
+            while self._expiry and self._expiry[0][0] <= now:
+                deadline, key = heapq.heappop(self._expiry)
+                entry = self._storage.get(key)
+                if entry is not None and entry[1] == deadline:
+                    self._evict(key)
+            
+            delay = EXPIRY_SWEEP_INTERVAL
+            if self._expiry:
+                delay = min(delay, (self._expiry[0][0] - now) / 1e9)
+            await asyncio.sleep(delay)
+    
+    def _encode(self, value: Any) -> Any:
+        """Wire form of a value; the in-memory backend keeps Python objects as-is"""
+        if not self._is_real_redis:
+            if dataclasses.is_dataclass(value) and not isinstance(value, type):
+                return dataclasses.asdict(value)
+            return value
+        encoder = WIRE_ENCODERS.get(type(value))
+        if encoder is not None:
+            return encoder(value)
+        if dataclasses.is_dataclass(value):
+            return _encode_json(value)
+        return _encode_str(str(value))
+    
+    def _decode(self, value: Any) -> Any:
+        """Python form of a stored value, dispatched on its tag byte"""
+        if not self._is_real_redis:
+            return value
+        tag = value[0] if value else None
+        if tag == TAG_JSON:
+            return json_loads(value[1:])
+        if tag == TAG_STR:
+            return value[1:].decode("utf-8")
+        if tag == TAG_BYTES:
+            return value[1:]
+        # Untagged values written before tagging: try JSON, fall back to text
+        # (orjson.JSONDecodeError subclasses ValueError)
         try:
-            if isinstance(value, (dict, list)):
-                self._storage[key] = json.dumps(value)
-            else:
-                self._storage[key] = str(value)
+            return json_loads(value)
+        except ValueError:
+            return value.decode("utf-8") if isinstance(value, bytes) else value
+    
+    async def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        """
+        Set a key-value pair
+        
+        Without a connection string values are stored by reference, so
+        callers must not mutate a value after storing or reading it.
+        """
+        self._debug("Setting key %s with expire %s", key, expire)
+        self._l1.pop(key, None)
+        if self._redis is None:
+            self._store(key, self._encode(value), expire)
+            return True
+        try:
+            await self._wire_set(self._redis, key, self._encode(value), expire)
             return True
         except Exception as e:
             self.logger.error(f"Error setting key {key}: {e}")
             return False
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get a value by key"""
-        self.logger.info(f"Getting key {key}")
-        try:
-            value = self._storage.get(key)
+    async def get(self, key: str, use_l1: bool = False) -> Optional[Any]:
+        """
+        Get a value by key
+        
+        Pass use_l1=True to serve the value from the client-side cache, only
+        for keys whose value never changes once written (content-addressed
+        caches): the cache is not told about writes from other processes.
+        """
+        self._debug("Getting key %s", key)
+        if self._redis is None:
+            return self._load(key)
+        
+        use_l1 = use_l1 and self.l1_capacity > 0
+        value = self._l1_get(key) if use_l1 else _MISS
+        if value is _MISS:
+            try:
+                value = await self._wire_get(self._redis, key)
+            except Exception as e:
+                self.logger.error(f"Error getting key {key}: {e}")
+                return None
             if value is None:
                 return None
-            # Try to parse as JSON, fallback to string
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+            if use_l1:
+                self._l1_put(key, value)
+        
+        # The cache holds wire bytes, so every caller decodes its own copy
+        return self._decode(value)
+    
+    def _l1_get(self, key: str) -> Any:
+        """Fresh client-side cached wire bytes for a key, or _MISS"""
+        entry = self._l1.get(key)
+        if entry is None:
+            return _MISS
+        if time.monotonic_ns() >= entry[1]:
+            del self._l1[key]
+            return _MISS
+        self._l1.move_to_end(key)
+        return entry[0]
+    
+    def _l1_put(self, key: str, value: Any):
+        """Cache a value's wire bytes client-side, evicting the least recently used entry"""
+        self._l1[key] = (value, time.monotonic_ns() + int(self.l1_ttl * 1_000_000_000))
+        if len(self._l1) > self.l1_capacity:
+            self._l1.popitem(last=False)
+    
+    async def getb(self, key: str) -> Optional[bytes]:
+        """
+        Get a value as bytes: the payload of a setb value, the JSON of a
+        document, or the UTF-8 encoding of a string
+        
+        Prefer getb/setb for values that are already bytes (rendered
+        responses, files): nothing is decoded or parsed on the way out.
+        """
+        if self._redis is None:
+            value = self._load(key)
+            if value is None or isinstance(value, bytes):
                 return value
+            return value.encode("utf-8") if isinstance(value, str) else json_dumps_bytes(value)
+        try:
+            value = await self._wire_get(self._redis, key)
         except Exception as e:
             self.logger.error(f"Error getting key {key}: {e}")
             return None
+        if value is not None and value[:1] in (b"B", b"J", b"S"):
+            return value[1:]
+        return value
     
-    def delete(self, key: str) -> bool:
+    async def setb(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        """Set a raw bytes value, skipping serialization (only the bytes tag is added)"""
+        self._l1.pop(key, None)
+        if self._redis is None:
+            self._store(key, value, expire)
+            return True
+        try:
+            await self._wire_set(self._redis, key, _encode_bytes(value), expire)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error setting key {key}: {e}")
+            return False
+    
+    async def set_large(self, key: str, value: Union[Dict[str, Any], List[Any]], expire: Optional[int] = None) -> bool:
+        """
+        Store a large dict or list as a hash with one field per item
+        
+        Items are encoded and sent LARGE_VALUE_CHUNK at a time, so peak
+        memory follows the largest chunk rather than one serialized blob.
+        List items are keyed by index. Readers may see a partially written
+        value until set_large returns.
+        """
+        self._l1.pop(key, None)
+        if self._redis is None:
+            self._store(key, value, expire)
+            return True
+        
+        is_dict = isinstance(value, dict)
+        items = iter(value.items() if is_dict else enumerate(value))
+        try:
+            await self._redis.delete(key)
+            await self._redis.hset(key, LARGE_VALUE_KIND_FIELD, "dict" if is_dict else "list")
+            while True:
+                chunk = {
+                    str(field): self._encode(item)
+                    for field, item in itertools.islice(items, LARGE_VALUE_CHUNK)
+                }
+                if not chunk:
+                    break
+                await self._redis.hset(key, mapping=chunk)
+            if expire:
+                await self._redis.expire(key, expire)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error setting large key {key}: {e}")
+            return False
+    
+    async def get_large(self, key: str) -> Optional[Union[Dict[str, Any], List[Any]]]:
+        """Read back a value stored with set_large"""
+        if self._redis is None:
+            return self._load(key)
+        try:
+            fields = await self._redis.hgetall(key)
+        except Exception as e:
+            self.logger.error(f"Error getting large key {key}: {e}")
+            return None
+        
+        kind = fields.pop(LARGE_VALUE_KIND_FIELD.encode("utf-8"), None)
+        if kind is None:
+            return None
+        decode = self._decode
+        if kind == b"dict":
+            return {field.decode("utf-8"): decode(item) for field, item in fields.items()}
+        return [decode(item) for _, item in sorted(fields.items(), key=lambda entry: int(entry[0]))]
+    
+    async def mset(self, mapping: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """Set several key-value pairs in one round trip"""
+        for key in mapping:
+            self._l1.pop(key, None)
+        if self._redis is None:
+            store, encode = self._store, self._encode
+            for key, value in mapping.items():
+                store(key, encode(value), expire)
+            return True
+        try:
+            encoded = {key: self._encode(value) for key, value in mapping.items()}
+            if expire is None and not self._hash_prefixes:
+                await self._redis.mset(encoded)
+            else:
+                # MSET has no expiry option and cannot write hash fields,
+                # so pipeline one command per key
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key, value in encoded.items():
+                        self._wire_set(pipe, key, value, expire)
+                    await pipe.execute()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error setting {len(mapping)} keys: {e}")
+            return False
+    
+    async def mget(self, keys: List[str], use_l1: bool = False) -> List[Optional[Any]]:
+        """
+        Get several values in one round trip, None for missing keys
+        
+        With use_l1=True (see get) keys held in the client-side cache are
+        answered locally; only the rest go to the server, in a single MGET.
+        """
+        if not keys:
+            return []
+        self._debug("Getting %s keys", len(keys))
+        if self._redis is None:
+            load = self._load
+            return [load(key) for key in keys]
+        
+        use_l1 = use_l1 and self.l1_capacity > 0
+        if use_l1:
+            l1_get = self._l1_get
+            raw = [l1_get(key) for key in keys]
+            missing = [key for key, value in zip(keys, raw) if value is _MISS]
+        else:
+            raw = [_MISS] * len(keys)
+            missing = keys
+        
+        if missing:
+            try:
+                if not self._hash_prefixes:
+                    values = await self._redis.mget(missing)
+                else:
+                    async with self._redis.pipeline(transaction=False) as pipe:
+                        for key in missing:
+                            self._wire_get(pipe, key)
+                        values = await pipe.execute()
+            except Exception as e:
+                self.logger.error(f"Error getting {len(missing)} keys: {e}")
+                values = [None] * len(missing)
+            
+            fetched = iter(values)
+            for index, value in enumerate(raw):
+                if value is _MISS:
+                    value = next(fetched)
+                    if value is not None and use_l1:
+                        self._l1_put(keys[index], value)
+                    raw[index] = value
+        
+        # The cache holds wire bytes, so every caller decodes its own copy
+        decode = self._decode
+        return [None if value is None else decode(value) for value in raw]
+    
+    def pipeline(self, transaction: bool = True) -> RedisPipeline:
+        """Start a pipeline for batching writes into one round trip"""
+        return RedisPipeline(self, transaction=transaction)
+    
+    async def delete(self, key: str) -> bool:
         """Delete a key"""
-        self.logger.info(f"Deleting key {key}")
+        self._debug("Deleting key %s", key)
+        self._l1.pop(key, None)
+        if self._redis is None:
+            route = self._route(key)
+            if route is None:
+                self._evict(key)
+            else:
+                fields = self._hashes.get(route[0], {})
+                fields.pop(route[1], None)
+                if not fields:
+                    self._hashes.pop(route[0], None)
+            return True
         try:
-            if key in self._storage:
-                del self._storage[key]
+            await self._wire_delete(self._redis, key)
             return True
         except Exception as e:
             self.logger.error(f"Error deleting key {key}: {e}")
             return False
     
-    def exists(self, key: str) -> bool:
+    async def exists(self, key: str) -> bool:
         """Check if a key exists"""
-        return key in self._storage
+        if self._redis is not None:
+            route = self._route(key)
+            if route is not None:
+                return bool(await self._redis.hexists(*route))
+            return bool(await self._redis.exists(key))
+        return self._load(key) is not None
     
-    def expire(self, key: str, seconds: int) -> bool:
+    async def expire(self, key: str, seconds: int) -> bool:
         """Set expiration for a key"""
-        self.logger.info(f"Setting expiration for key {key}: {seconds} seconds")
-        # Basic implementation - just log the action
+        self._debug("Setting expiration for key %s: %s seconds", key, seconds)
+        if self._redis is not None:
+            self._l1.pop(key, None)
+            return bool(await self._redis.expire(key, seconds))
+        value = self._load(key)
+        if value is None:
+            return False
+        self._store(key, value, seconds)
         return True
     
+    async def publish(self, channel: str, message: Any) -> int:
+        """
+        Publish a message to a channel, returning the number of receivers
+        
+        With a server, messages go through Redis PUBLISH so subscribers in
+        other processes (analysis workers, Celery) receive them.
+        """
+        if self._redis is not None:
+            try:
+                return await self._redis.publish(channel, self._encode(message))
+            except Exception as e:
+                self.logger.error(f"Error publishing to channel {channel}: {e}")
+                return 0
+        
+        queues = self._subscribers.get(channel, set())
+        for queue in queues:
+            queue.put_nowait(message)
+        return len(queues)
+    
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """Subscribe to a channel, yielding a queue of published messages"""
+        if self._redis is not None:
+            async with self._subscribe_server(channel) as queue:
+                yield queue
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+    
+    @asynccontextmanager
+    async def _subscribe_server(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """Subscribe through Redis pub/sub, relaying decoded messages into a queue"""
+        queue: asyncio.Queue = asyncio.Queue()
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        
+        async def relay():
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    queue.put_nowait(self._decode(message["data"]))
+        
+        relay_task = asyncio.create_task(relay())
+        try:
+            yield queue
+        finally:
+            relay_task.cancel()
+            await asyncio.gather(relay_task, return_exceptions=True)
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+    
     async def ping(self) -> bool:
         """Ping Redis server"""
         self.logger.info("Pinging Redis server")
+        if self._redis is not None:
+            return await self._redis.ping()
         return True
     
     async def close(self) -> bool:
         """Close Redis connection"""
         self.logger.info("Closing Redis connection")
-        return True
+        return await self.disconnect()
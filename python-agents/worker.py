@@ -0,0 +1,57 @@
+"""
+Celery worker for AgentFlow
+Runs analysis sessions on dedicated worker processes
+
+Start with: celery -A worker worker --loglevel=info
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from celery import Celery
+
+from orchestrator.graph import run_analysis_in_process
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+app = Celery("agentflow", broker=REDIS_URL, backend=REDIS_URL)
+app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # Acknowledge only after the run so a lost worker's session is redelivered
+    # (its staged files are only removed once a run finishes)
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1
+)
+
+
+@app.task
+def run_analysis_task(
+    session_id: str,
+    project_id: int,
+    files: List[Dict[str, Any]],
+    agents_config: Optional[Dict[str, bool]] = None,
+    model: str = "llama-3-70b",
+    tone: str = "professional"
+) -> Dict[str, str]:
+    """
+    Run one analysis session on this worker's orchestrator; results land in the database
+    
+    Failures are not retried: by the time run_analysis raises it has
+    already marked the session failed, published that status and removed
+    the session's staged files.
+    """
+    [result] = run_analysis_in_process([{
+        "session_id": session_id,
+        "project_id": project_id,
+        "files": files,
+        "agents_config": agents_config,
+        "model": model,
+        "tone": tone
+    }])
+
+    if isinstance(result, Exception):
+        raise result
+    return {"session_id": session_id, "status": "completed"}